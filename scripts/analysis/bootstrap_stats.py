@@ -0,0 +1,158 @@
+"""Vectorized bootstrap statistics for benchmark results.
+
+All resamples are drawn as one index matrix and the statistic is evaluated
+along its rows with NumPy, so 10k resamples of a 35-run experiment cost a few
+milliseconds instead of a Python loop per resample. Resamples are processed in
+chunks to keep the index matrix bounded for large inputs.
+
+Usage:
+    python3 bootstrap_stats.py                      # comprehensive CSV
+    python3 bootstrap_stats.py path/to/results.csv --resamples 20000
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'data', 'sparql_comprehensive_performance.csv')
+
+DEFAULT_STATISTICS = ('mean', 'median', 'p90', 'p95', 'p99')
+CHUNK_ELEMENTS = 4_000_000
+
+
+def compute_statistic(samples, name):
+    """Evaluate a named statistic along the last axis of `samples`."""
+    if name == 'mean':
+        return samples.mean(axis=-1)
+    if name == 'median':
+        return np.median(samples, axis=-1)
+    if name.startswith('p') and name[1:].replace('.', '', 1).isdigit():
+        return np.percentile(samples, float(name[1:]), axis=-1)
+    raise ValueError(f"Unknown statistic '{name}'")
+
+
+def bootstrap_distribution(data, statistic='mean', n_resamples=10_000, seed=None):
+    """Return the bootstrap distribution of `statistic` over `data`.
+
+    `data` may be 1-D (one sample) or 2-D with paired columns; in the paired
+    case rows are resampled together and `statistic` receives an array of
+    shape (resamples, n, columns) and must reduce the last two axes itself.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.shape[0]
+    if n == 0:
+        raise ValueError('Cannot bootstrap an empty sample')
+    rng = np.random.default_rng(seed)
+    row_size = int(np.prod(data.shape))
+    chunk = max(1, CHUNK_ELEMENTS // row_size)
+
+    out = np.empty(n_resamples)
+    for start in range(0, n_resamples, chunk):
+        stop = min(start + chunk, n_resamples)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        samples = data[idx]
+        out[start:stop] = statistic(samples) if callable(statistic) else compute_statistic(samples, statistic)
+    return out
+
+
+def bootstrap_ci(data, statistic='mean', n_resamples=10_000, confidence=0.95, seed=None):
+    """Percentile bootstrap confidence interval.
+
+    Returns a dict with the point estimate and the lower/upper bounds.
+    """
+    data = np.asarray(data, dtype=float)
+    dist = bootstrap_distribution(data, statistic, n_resamples, seed)
+    alpha = (1 - confidence) / 2
+    estimate = statistic(data[np.newaxis])[0] if callable(statistic) else compute_statistic(data, statistic)
+    lower, upper = np.percentile(dist, [alpha * 100, (1 - alpha) * 100])
+    return {'estimate': float(estimate), 'lower': float(lower), 'upper': float(upper)}
+
+
+def bootstrap_summary(data, statistics=DEFAULT_STATISTICS, n_resamples=10_000, confidence=0.95, seed=None):
+    """Bootstrap CIs for several statistics of one sample, as a DataFrame.
+
+    The same resample indices are shared by all statistics.
+    """
+    data = np.asarray(data, dtype=float)
+    data = data[~np.isnan(data)]
+    rows = []
+    for name in statistics:
+        ci = bootstrap_ci(data, name, n_resamples, confidence, seed)
+        rows.append({'statistic': name, **ci})
+    return pd.DataFrame(rows)
+
+
+def speedup_ratios(df, baseline='super_time', candidate='par_total_time'):
+    """Per-iteration speedup ratio baseline / candidate."""
+    return (df[baseline] / df[candidate]).to_numpy(dtype=float)
+
+
+def paired_deltas(df, baseline, candidate):
+    """Per-iteration resource delta candidate - baseline."""
+    return (df[candidate] - df[baseline]).to_numpy(dtype=float)
+
+
+def _independent_distributions(baseline, candidate, statistic, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    base_seed, cand_seed = rng.integers(0, 2**32, size=2)
+    baseline = np.asarray(baseline, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    base = bootstrap_distribution(baseline[~np.isnan(baseline)], statistic, n_resamples, base_seed)
+    cand = bootstrap_distribution(candidate[~np.isnan(candidate)], statistic, n_resamples, cand_seed)
+    return base, cand
+
+
+def relative_change_distribution(baseline, candidate, statistic='mean', n_resamples=10_000, seed=None):
+    """Bootstrap distribution of (stat(candidate) - stat(baseline)) / |stat(baseline)|.
+
+    Baseline and candidate are independent runs and are resampled separately.
+    Only meaningful for metrics whose statistic stays well away from zero.
+    """
+    base, cand = _independent_distributions(baseline, candidate, statistic, n_resamples, seed)
+    return (cand - base) / np.abs(base)
+
+
+def absolute_change_distribution(baseline, candidate, statistic='mean', n_resamples=10_000, seed=None):
+    """Bootstrap distribution of stat(candidate) - stat(baseline), in the metric's unit.
+
+    Use this instead of the relative change for metrics that can cross zero,
+    such as heap deltas, where the relative change has no stable denominator.
+    """
+    base, cand = _independent_distributions(baseline, candidate, statistic, n_resamples, seed)
+    return cand - base
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals for benchmark results')
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    parser.add_argument('--resamples', type=int, default=10_000)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.csv)
+    parallel_time = 'par_total_time' if 'par_total_time' in df.columns else 'parallel_total_time'
+
+    print("=" * 60)
+    print(f"BOOTSTRAP ANALYSIS ({args.resamples} resamples, {args.confidence:.0%} CI)")
+    print("=" * 60)
+
+    print("\nSpeedup ratio (super / parallel+join):")
+    print(bootstrap_summary(speedup_ratios(df, 'super_time', parallel_time),
+                            n_resamples=args.resamples, confidence=args.confidence,
+                            seed=args.seed).to_string(index=False))
+
+    for resource in ('memory', 'cpu'):
+        base, cand = f'super_{resource}', f'par_{resource}'
+        if base in df.columns and cand in df.columns:
+            print(f"\n{resource.upper()} delta (parallel+join - super):")
+            print(bootstrap_summary(paired_deltas(df, base, cand),
+                                    n_resamples=args.resamples, confidence=args.confidence,
+                                    seed=args.seed).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
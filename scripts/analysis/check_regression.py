@@ -0,0 +1,180 @@
+"""Performance-regression gate for benchmark runs.
+
+Compares a candidate run against a stored baseline and exits non-zero when
+QueryDiff generation time, or the latency, memory or CPU of the parallel+join
+path, regress beyond a threshold with statistical confidence. For every metric
+the bootstrap distribution of the change of the chosen statistic is computed;
+a metric regresses when the one-sided lower confidence bound of that change
+exceeds the threshold, i.e. the slowdown is both larger than tolerated and not
+noise.
+
+Metrics that stay positive (times, CPU, peak memory) are gated on their
+relative change. Metrics that can cross zero, such as the `par_memory` heap
+delta, are gated on their absolute change in the metric's own unit, since a
+relative change against a baseline near zero is meaningless.
+
+Runs are taken from the results store (see results_store.py) or, with
+--csv, directly from benchmark CSV files. The check also fails when a run id is
+not in the store, when no metric could be evaluated, or when a metric named
+with --metrics is missing from either run; default metrics a run did not
+record are only reported as skipped.
+
+Usage:
+    python3 check_regression.py nightly-2024-01-01 nightly-2024-01-02
+    python3 check_regression.py --csv baseline.csv candidate.csv --threshold 0.1
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from bootstrap_stats import absolute_change_distribution, compute_statistic, relative_change_distribution
+from results_store import DEFAULT_STORE, load_runs, normalize_results, read_manifest, result_columns
+
+# Metric -> (resource category, change mode). All of them are "lower is
+# better". Peak metrics are exported from the ResourceSampler time series by
+# `resource_timeseries_analysis.py --export`.
+DEFAULT_METRICS = {
+    'diff_time': ('latency', 'relative'),
+    'par_total_time': ('latency', 'relative'),
+    'par_combination_time': ('latency', 'relative'),
+    'par_memory': ('memory', 'absolute'),
+    'par_peak_rss_mb': ('memory', 'relative'),
+    'par_peak_heap_mb': ('memory', 'relative'),
+    'par_cpu': ('cpu', 'relative'),
+}
+
+# Tolerated absolute regression for absolute-mode metrics, in MB.
+DEFAULT_ABSOLUTE_THRESHOLD = 1.0
+
+
+def metric_mode(metric, baseline_values):
+    """'relative' or 'absolute' change mode for a metric.
+
+    Metrics not listed in DEFAULT_METRICS are gated on the absolute change
+    when their baseline has values at or below zero.
+    """
+    if metric in DEFAULT_METRICS:
+        return DEFAULT_METRICS[metric][1]
+    return 'absolute' if (np.asarray(baseline_values) <= 0).any() else 'relative'
+
+
+def check_regressions(baseline, candidate, metrics=None, threshold=0.05, thresholds=None,
+                      statistic='mean', confidence=0.95, n_resamples=10_000, seed=0,
+                      absolute_threshold=DEFAULT_ABSOLUTE_THRESHOLD):
+    """Evaluate every metric and return one row per metric as a DataFrame.
+
+    `baseline` and `candidate` are frames in the canonical results schema.
+    `threshold` applies to relative-mode metrics and `absolute_threshold` to
+    absolute-mode ones; `thresholds` overrides either per metric, in that
+    metric's mode. Metrics missing from either run are reported with status
+    'skipped'.
+    """
+    metrics = list(metrics or DEFAULT_METRICS)
+    thresholds = thresholds or {}
+    rows = []
+    for metric in metrics:
+        category = DEFAULT_METRICS.get(metric, ('-', None))[0]
+        base = baseline[metric].dropna().to_numpy(dtype=float) if metric in baseline else np.array([])
+        cand = candidate[metric].dropna().to_numpy(dtype=float) if metric in candidate else np.array([])
+        mode = metric_mode(metric, base)
+        limit = thresholds.get(metric, absolute_threshold if mode == 'absolute' else threshold)
+        if len(base) == 0 or len(cand) == 0:
+            rows.append({'metric': metric, 'category': category, 'mode': mode,
+                         'change': np.nan, 'lower': np.nan, 'upper': np.nan,
+                         'threshold': limit, 'status': 'skipped'})
+            continue
+
+        point = compute_statistic(cand, statistic) - compute_statistic(base, statistic)
+        if mode == 'absolute':
+            dist = absolute_change_distribution(base, cand, statistic, n_resamples, seed)
+        else:
+            dist = relative_change_distribution(base, cand, statistic, n_resamples, seed)
+            point /= abs(compute_statistic(base, statistic))
+        lower, upper = np.percentile(dist, [(1 - confidence) * 100, confidence * 100])
+        if lower > limit:
+            status = 'REGRESSION'
+        elif upper < -limit:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'metric': metric, 'category': category, 'mode': mode,
+                     'change': point, 'lower': lower, 'upper': upper,
+                     'threshold': limit, 'status': status})
+    return pd.DataFrame(rows)
+
+
+def _parse_thresholds(pairs):
+    thresholds = {}
+    for pair in pairs or []:
+        metric, sep, value = pair.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected metric=threshold, got '{pair}'")
+        thresholds[metric] = float(value)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fail when a candidate run regresses against a baseline')
+    parser.add_argument('baseline', help='Baseline run id (or CSV path with --csv)')
+    parser.add_argument('candidate', help='Candidate run id (or CSV path with --csv)')
+    parser.add_argument('--csv', action='store_true', help='Treat baseline/candidate as CSV files')
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--metrics', nargs='+',
+                        help='Metrics to gate on, all required (default: every DEFAULT_METRICS entry recorded)')
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help='Tolerated relative regression (0.05 = 5%%)')
+    parser.add_argument('--absolute-threshold', type=float, default=DEFAULT_ABSOLUTE_THRESHOLD,
+                        help='Tolerated absolute regression for metrics that can cross zero (MB)')
+    parser.add_argument('--metric-threshold', action='append',
+                        help='Per-metric threshold as metric=value')
+    parser.add_argument('--statistic', default='mean', help='mean, median or pNN (e.g. p95)')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--resamples', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    metrics = args.metrics or list(DEFAULT_METRICS)
+
+    if args.csv:
+        baseline = normalize_results(pd.read_csv(args.baseline)).to_pandas()
+        candidate = normalize_results(pd.read_csv(args.candidate)).to_pandas()
+    else:
+        known = set(read_manifest(args.store)['run_id'])
+        missing = [run_id for run_id in (args.baseline, args.candidate) if run_id not in known]
+        if missing:
+            parser.error(f"Unknown run id(s) in {args.store}: {', '.join(missing)}")
+        stored = set(result_columns(args.store))
+        df = load_runs([args.baseline, args.candidate], [m for m in metrics if m in stored], args.store)
+        baseline = df[df['run_id'] == args.baseline]
+        candidate = df[df['run_id'] == args.candidate]
+
+    report = check_regressions(baseline, candidate, metrics, args.threshold,
+                               _parse_thresholds(args.metric_threshold), args.statistic,
+                               args.confidence, args.resamples, args.seed, args.absolute_threshold)
+
+    print("=" * 60)
+    print(f"REGRESSION CHECK: {args.candidate} vs {args.baseline}")
+    print(f"statistic={args.statistic}, one-sided confidence={args.confidence:.0%}")
+    print("=" * 60)
+    print(report.to_string(index=False, float_format=lambda v: f'{v:+.3f}'))
+
+    failures = []
+    regressions = report[report['status'] == 'REGRESSION']
+    if len(regressions) > 0:
+        failures.append(f"{len(regressions)} metric(s) regressed: {', '.join(regressions['metric'])}")
+    skipped = report[report['status'] == 'skipped']
+    if len(skipped) == len(report):
+        failures.append("no metric could be evaluated")
+    elif args.metrics and len(skipped) > 0:
+        failures.append(f"requested metric(s) missing from a run: {', '.join(skipped['metric'])}")
+    if failures:
+        print(f"\nFAILED: {'; '.join(failures)}")
+        return 1
+    print("\nPASSED: no statistically significant regression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
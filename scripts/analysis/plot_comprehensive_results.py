@@ -4,6 +4,8 @@ import numpy as np
 import seaborn as sns
 from scipy import stats
 
+from bootstrap_stats import bootstrap_summary
+
 # Set style for better-looking plots
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -195,3 +197,11 @@ super_wins = sum(1 for ratio in speedup_ratios if ratio > 1)
 parallel_wins = len(speedup_ratios) - super_wins
 print(f"Super Query wins: {super_wins}/{len(speedup_ratios)} ({super_wins/len(speedup_ratios)*100:.1f}%)")
 print(f"Parallel wins: {parallel_wins}/{len(speedup_ratios)} ({parallel_wins/len(speedup_ratios)*100:.1f}%)")
+
+# Bootstrap CIs (no normality assumption, covers the tail percentiles too)
+print(f"\nBootstrap 95% CIs for speedup ratio:")
+print(bootstrap_summary(speedup_ratios, seed=0).to_string(index=False))
+print(f"\nBootstrap 95% CIs for memory delta (parallel - super, MB):")
+print(bootstrap_summary(parallel_memory - super_memory, seed=0).to_string(index=False))
+print(f"\nBootstrap 95% CIs for CPU delta (parallel - super, ms):")
+print(bootstrap_summary(parallel_cpu - super_cpu, seed=0).to_string(index=False))
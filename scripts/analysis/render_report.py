@@ -0,0 +1,215 @@
+"""Parallel, incremental rendering of the analysis figures.
+
+Every figure of the report is described by a FigureJob: the plotting script
+(or a module-level function returning a Figure), the data files it reads,
+the files it writes and its plotting parameters. Jobs are rendered in a
+process pool on the headless Agg backend. A job is skipped when the hash of
+its code, inputs and parameters matches the hash recorded for its outputs in
+the render cache, so regenerating the report after a run that did not touch
+a figure's data costs nothing for that figure.
+
+Usage:
+    python3 render_report.py               # render stale figures
+    python3 render_report.py --force       # re-render everything
+    python3 render_report.py --jobs 4 comprehensive resource
+"""
+
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import runpy
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'data'))
+IMAGES_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'images'))
+CACHE_FILE = os.path.join(IMAGES_DIR, '.render_cache.json')
+
+
+@dataclass
+class FigureJob:
+    """One independently renderable figure.
+
+    Exactly one of `script` (run as __main__ from scripts/analysis) or `func`
+    (a module-level callable taking **params and returning a Figure, saved to
+    the first output at `dpi`) must be set. Scripts choose their own
+    parameters and resolution, so `params` and `dpi` only apply to `func`
+    jobs.
+    """
+    name: str
+    inputs: list
+    outputs: list
+    script: str = None
+    func: object = None
+    params: dict = field(default_factory=dict)
+    dpi: int = None
+
+    def __post_init__(self):
+        if (self.script is None) == (self.func is None):
+            raise ValueError(f"FigureJob '{self.name}' needs exactly one of script or func")
+        if self.script and (self.params or self.dpi is not None):
+            raise ValueError(f"FigureJob '{self.name}': params and dpi only apply to func jobs")
+        if self.func and self.dpi is None:
+            self.dpi = 300
+
+
+REPORT_JOBS = [
+    FigureJob('comprehensive', script='plot_comprehensive_results.py',
+              inputs=[os.path.join(DATA_DIR, 'sparql_comprehensive_performance.csv')],
+              outputs=[os.path.join(IMAGES_DIR, 'comprehensive_sparql_analysis.png')]),
+    FigureJob('resource', script='plot_resource_comparison.py',
+              inputs=[os.path.join(DATA_DIR, 'sparql_comprehensive_performance.csv')],
+              outputs=[os.path.join(IMAGES_DIR, 'resource_usage_comparison.png')]),
+    FigureJob('memory', script='plot_memory_analysis.py',
+              inputs=[os.path.join(DATA_DIR, 'sparql_comprehensive_performance.csv')],
+              outputs=[os.path.join(SCRIPT_DIR, 'memory_usage_analysis.png')]),
+    FigureJob('cpu', script='plot_cpu_analysis.py',
+              inputs=[os.path.join(DATA_DIR, 'sparql_comprehensive_performance.csv')],
+              outputs=[os.path.join(SCRIPT_DIR, 'cpu_usage_analysis.png')]),
+    FigureJob('performance', script='plot_performance_comparison.py',
+              inputs=[os.path.join(DATA_DIR, 'sparql_comprehensive_performance.csv')],
+              outputs=[os.path.join(SCRIPT_DIR, 'performance_comparison.png')]),
+]
+
+
+def job_hash(job):
+    """Hash of everything that determines a job's output."""
+    import matplotlib
+
+    digest = hashlib.sha256()
+    if job.script:
+        with open(os.path.join(SCRIPT_DIR, job.script), 'rb') as f:
+            digest.update(f.read())
+    else:
+        digest.update(f'{job.func.__module__}.{job.func.__qualname__}'.encode())
+        with open(inspect.getsourcefile(job.func), 'rb') as f:
+            digest.update(f.read())
+        digest.update(json.dumps(job.params, sort_keys=True, default=str).encode())
+        digest.update(str(job.dpi).encode())
+    for path in job.inputs:
+        digest.update(path.encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    digest.update(matplotlib.__version__.encode())
+    return digest.hexdigest()
+
+
+def load_cache(path=CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def is_fresh(job, digest, cache):
+    return cache.get(job.name) == digest and all(os.path.exists(p) for p in job.outputs)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+
+def _render(job):
+    """Render one job in a worker process; returns (name, seconds, console output)."""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    output = io.StringIO()
+    cwd = os.getcwd()
+    try:
+        os.chdir(SCRIPT_DIR)
+        if SCRIPT_DIR not in sys.path:
+            sys.path.insert(0, SCRIPT_DIR)
+        with contextlib.redirect_stdout(output):
+            if job.script:
+                try:
+                    runpy.run_path(os.path.join(SCRIPT_DIR, job.script), run_name='__main__')
+                except SystemExit as exit_:
+                    if exit_.code not in (None, 0):
+                        raise RuntimeError(f'{job.script} exited with status {exit_.code}') from None
+            else:
+                fig = job.func(**job.params)
+                fig.savefig(job.outputs[0], dpi=job.dpi, bbox_inches='tight')
+    finally:
+        plt.close('all')
+        os.chdir(cwd)
+    return job.name, time.perf_counter() - start, output.getvalue()
+
+
+def render_jobs(jobs, max_workers=None, force=False, cache_path=CACHE_FILE, verbose=False):
+    """Render stale jobs in parallel and update the cache.
+
+    Returns a dict job name -> 'rendered' | 'cached' | 'failed: <error>'.
+    """
+    cache = load_cache(cache_path)
+    digests = {job.name: job_hash(job) for job in jobs}
+    status = {}
+    stale = []
+    for job in jobs:
+        if not force and is_fresh(job, digests[job.name], cache):
+            status[job.name] = 'cached'
+        else:
+            stale.append(job)
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, job): job for job in stale}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    _, seconds, console = future.result()
+                except BaseException as error:
+                    status[job.name] = f'failed: {error}'
+                    cache.pop(job.name, None)
+                    continue
+                status[job.name] = 'rendered'
+                cache[job.name] = digests[job.name]
+                print(f"  {job.name}: rendered in {seconds:.1f}s")
+                if verbose and console:
+                    print(console)
+        save_cache(cache, cache_path)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the analysis report figures')
+    parser.add_argument('names', nargs='*', help='Only render these jobs')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Ignore the render cache')
+    parser.add_argument('--verbose', action='store_true', help='Print the console output of each script')
+    args = parser.parse_args(argv)
+
+    jobs = REPORT_JOBS
+    if args.names:
+        unknown = set(args.names) - {job.name for job in jobs}
+        if unknown:
+            parser.error(f"unknown jobs: {', '.join(sorted(unknown))}")
+        jobs = [job for job in jobs if job.name in args.names]
+
+    print(f"Rendering {len(jobs)} figure(s)...")
+    status = render_jobs(jobs, args.jobs, args.force, verbose=args.verbose)
+    for name, state in status.items():
+        if state != 'rendered':
+            print(f"  {name}: {state}")
+    return 1 if any(state.startswith('failed') for state in status.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
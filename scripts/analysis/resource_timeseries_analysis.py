@@ -0,0 +1,203 @@
+"""Analysis of sampled resource time series.
+
+Reads the samples and GC-event CSVs written by the benchmark harness through
+`ResourceSampler.samplesToCSV` / `ResourceSampler.gcEventsToCSV` and reports
+per strategy:
+- peak RSS and peak heapUsed, absolute and above the level at query start
+- area under the RSS / heapUsed curves (MB·s), i.e. memory held over time
+- CPU user/system time
+- GC pause time and the share of wall time spent in GC
+
+Unlike the single heap deltas in the `*_memory` columns, peaks taken from the
+time series never go negative when a collection happens mid-query, so they
+can be used for container sizing.
+
+With --export the per-run peaks are written in the results-store schema,
+one row per iteration with columns such as `par_peak_rss_mb`, so that
+check_regression.py can gate on them. With --results they are appended to the
+benchmark CSV of the same iterations and both import as one run.
+
+Usage:
+    python3 resource_timeseries_analysis.py samples.csv gc_events.csv
+    python3 resource_timeseries_analysis.py samples.csv gc_events.csv --no-show \\
+        --results benchmark.csv --export benchmark_with_peaks.csv
+"""
+
+import argparse
+import os
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'images')
+
+MB = 1024 * 1024
+
+# Column prefix of each strategy in the results schema (see results_store.py);
+# other strategy labels are used as their own prefix.
+STRATEGY_PREFIXES = {
+    'super': 'super',
+    'sequential': 'seq',
+    'parallel': 'par',
+}
+
+# Run metrics written by --export, as `<prefix>_<metric>`.
+EXPORT_METRICS = [
+    'peak_rss_mb',
+    'peak_rss_above_start_mb',
+    'peak_heap_mb',
+    'peak_heap_above_start_mb',
+    'rss_auc_mb_s',
+    'heap_auc_mb_s',
+    'gc_ms',
+]
+
+
+def _auc(y, t):
+    """Trapezoidal area under y(t)."""
+    return float(np.sum((y[1:] + y[:-1]) * np.diff(t)) / 2)
+
+
+def summarize_run(samples, gc_events):
+    """Resource metrics for one run (one ResourceTrace)."""
+    samples = samples.sort_values('time_ms')
+    t_s = samples['time_ms'].to_numpy() / 1000
+    rss = samples['rss'].to_numpy() / MB
+    heap = samples['heap_used'].to_numpy() / MB
+    wall_ms = samples['time_ms'].iloc[-1] - samples['time_ms'].iloc[0]
+    gc_ms = gc_events['duration_ms'].sum() if len(gc_events) > 0 else 0.0
+    return {
+        'wall_ms': wall_ms,
+        'samples': len(samples),
+        'peak_rss_mb': rss.max(),
+        'peak_rss_above_start_mb': rss.max() - rss[0],
+        'peak_heap_mb': heap.max(),
+        'peak_heap_above_start_mb': heap.max() - heap[0],
+        'peak_external_mb': samples['external'].max() / MB,
+        'peak_array_buffers_mb': samples['array_buffers'].max() / MB,
+        'rss_auc_mb_s': _auc(rss, t_s),
+        'heap_auc_mb_s': _auc(heap - heap[0], t_s),
+        'cpu_user_ms': samples['cpu_user_ms'].iloc[-1],
+        'cpu_system_ms': samples['cpu_system_ms'].iloc[-1],
+        'gc_events': len(gc_events),
+        'gc_ms': gc_ms,
+        'gc_share': gc_ms / wall_ms if wall_ms > 0 else np.nan,
+    }
+
+
+def summarize_runs(samples, gc_events):
+    """One row of metrics per (strategy, run)."""
+    rows = []
+    gc_groups = dict(tuple(gc_events.groupby(['strategy', 'run']))) if len(gc_events) > 0 else {}
+    for (strategy, run), group in samples.groupby(['strategy', 'run']):
+        gc = gc_groups.get((strategy, run), gc_events.iloc[0:0])
+        rows.append({'strategy': strategy, 'run': run, **summarize_run(group, gc)})
+    return pd.DataFrame(rows)
+
+
+def summarize_strategies(runs):
+    """Aggregate run metrics per strategy: median and max of every metric."""
+    metrics = [c for c in runs.columns if c not in ('strategy', 'run')]
+    summary = runs.groupby('strategy')[metrics].agg(['median', 'max'])
+    summary.columns = [f'{metric}_{agg}' for metric, agg in summary.columns]
+    return summary
+
+
+def export_runs(runs, results=None):
+    """Run metrics in the results-store schema, one row per iteration.
+
+    The i-th run of every strategy becomes row i, with its metrics named
+    `<prefix>_<metric>` (e.g. `par_peak_rss_mb`). `results`, if given, is the
+    benchmark frame of the same iterations in run order; the metrics are
+    appended to its rows instead of numbering new iterations.
+    """
+    frames = []
+    for strategy, group in runs.groupby('strategy'):
+        prefix = STRATEGY_PREFIXES.get(strategy, strategy)
+        metrics = group.sort_values('run')[EXPORT_METRICS].reset_index(drop=True)
+        frames.append(metrics.add_prefix(f'{prefix}_'))
+    summary = pd.concat(frames, axis=1)
+
+    if results is None:
+        summary.insert(0, 'iteration', range(len(summary)))
+        return summary
+    if len(results) != len(summary):
+        raise ValueError(f"{len(results)} benchmark rows but {len(summary)} sampled runs per strategy")
+    return pd.concat([results.reset_index(drop=True), summary], axis=1)
+
+
+def plot_memory_curves(samples, output=None):
+    """Plot RSS and heapUsed over time per strategy (one line per run)."""
+    strategies = sorted(samples['strategy'].unique())
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    colors = dict(zip(strategies, plt.cm.tab10.colors))
+    for (strategy, run), group in samples.groupby(['strategy', 'run']):
+        group = group.sort_values('time_ms')
+        label = strategy if run == samples[samples['strategy'] == strategy]['run'].min() else None
+        ax1.plot(group['time_ms'], group['rss'] / MB, color=colors[strategy], alpha=0.5, label=label)
+        ax2.plot(group['time_ms'], group['heap_used'] / MB, color=colors[strategy], alpha=0.5, label=label)
+    for ax, title in ((ax1, 'RSS'), (ax2, 'heapUsed')):
+        ax.set_xlabel('Time since query start (ms)')
+        ax.set_ylabel(f'{title} (MB)')
+        ax.set_title(f'{title} Over Time')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    fig.suptitle('Sampled Memory Usage per Strategy', fontsize=16)
+    fig.tight_layout()
+    if output:
+        fig.savefig(output, dpi=300, bbox_inches='tight')
+    return fig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze sampled resource time series')
+    parser.add_argument('samples', help='Samples CSV from ResourceSampler.samplesToCSV')
+    parser.add_argument('gc_events', nargs='?', help='GC CSV from ResourceSampler.gcEventsToCSV')
+    parser.add_argument('--output', default=os.path.join(IMAGES_DIR, 'resource_timeseries.png'))
+    parser.add_argument('--no-show', action='store_true', help='Do not open the plot window')
+    parser.add_argument('--export', help='Write per-run peaks in the results-store schema to this CSV')
+    parser.add_argument('--results', help='Benchmark CSV of the same iterations to append the peaks to')
+    args = parser.parse_args(argv)
+    if args.results and not args.export:
+        parser.error('--results requires --export')
+
+    samples = pd.read_csv(args.samples)
+    if args.gc_events:
+        gc_events = pd.read_csv(args.gc_events)
+    else:
+        gc_events = pd.DataFrame(columns=['strategy', 'run', 'start_ms', 'duration_ms', 'kind'])
+
+    runs = summarize_runs(samples, gc_events)
+    summary = summarize_strategies(runs)
+
+    print("=" * 60)
+    print(f"RESOURCE TIME SERIES ANALYSIS ({len(runs)} runs)")
+    print("=" * 60)
+    for strategy, row in summary.iterrows():
+        print(f"\n{strategy}:")
+        print(f"  Peak RSS:        {row['peak_rss_mb_median']:.2f} MB median, {row['peak_rss_mb_max']:.2f} MB max")
+        print(f"  Peak heapUsed:   {row['peak_heap_mb_median']:.2f} MB median "
+              f"(+{row['peak_heap_above_start_mb_median']:.2f} MB above start)")
+        print(f"  Peak external:   {row['peak_external_mb_median']:.2f} MB "
+              f"(ArrayBuffers {row['peak_array_buffers_mb_median']:.2f} MB)")
+        print(f"  heapUsed AUC:    {row['heap_auc_mb_s_median']:.4f} MB·s")
+        print(f"  CPU user/system: {row['cpu_user_ms_median']:.2f} / {row['cpu_system_ms_median']:.2f} ms")
+        print(f"  GC time:         {row['gc_ms_median']:.2f} ms ({row['gc_share_median']:.1%} of wall time, "
+              f"{row['gc_events_median']:.0f} events)")
+
+    if args.export:
+        results = pd.read_csv(args.results) if args.results else None
+        exported = export_runs(runs, results)
+        exported.to_csv(args.export, index=False)
+        print(f"\nExported {len(exported)} iterations to {args.export}")
+
+    plot_memory_curves(samples, args.output)
+    if not args.no_show and matplotlib.get_backend().lower() != 'agg':
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
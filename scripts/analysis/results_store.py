@@ -0,0 +1,297 @@
+"""Columnar store for benchmark results.
+
+The benchmark CSVs in docs/data grew with diverging column names
+(`parallel_total_time`, `par_total_time`, `seq_final_time`, ...). This module
+normalizes them into one canonical schema and stores every run as its own
+partition of a Parquet (or Feather) dataset, keyed by run id. A small manifest
+records the git commit and workload parameters of each run.
+
+Numeric columns outside the canonical schema (sweep parameters, QueryDiff
+timings, resource summaries, ...) are kept as float64 extra columns. The
+manifest records them per run, and the dataset is read with the union of all
+runs' columns, so runs that did not record a column read it as null.
+
+Reads go through pyarrow datasets on a memory-mapped filesystem and only
+materialize the requested columns and partitions, so comparing two runs out
+of months of nightly results stays cheap.
+
+Usage:
+    python3 results_store.py import ../../docs/data/sparql_comprehensive_performance.csv \\
+        --run-id nightly-2024-01-01 --git-commit abc123 --param subqueries=3
+    python3 results_store.py list
+    python3 results_store.py compare nightly-2024-01-01 nightly-2024-01-02 \\
+        --metrics super_time par_total_time
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'data', 'results_store')
+
+# Canonical result columns. Every run is written with the full schema so that
+# partitions stay compatible; metrics a run did not record are left null.
+CANONICAL_SCHEMA = pa.schema([
+    ('iteration', pa.int64()),
+    ('super_time', pa.float64()),
+    ('super_memory', pa.float64()),
+    ('super_cpu', pa.float64()),
+    ('super_results', pa.float64()),
+    ('seq_query_time', pa.float64()),
+    ('seq_combination_time', pa.float64()),
+    ('seq_total_time', pa.float64()),
+    ('seq_results', pa.float64()),
+    ('par_query_time', pa.float64()),
+    ('par_combination_time', pa.float64()),
+    ('par_total_time', pa.float64()),
+    ('par_memory', pa.float64()),
+    ('par_cpu', pa.float64()),
+    ('par_results', pa.float64()),
+    ('speedup_ratio', pa.float64()),
+    ('diff_time', pa.float64()),
+])
+
+# Legacy column names -> canonical names. `sparql_realistic_performance.csv`
+# used `seq_total_time` for the query-only time and `seq_final_time` for the
+# time including combination; the canonical names mirror the `par_*` columns.
+COLUMN_ALIASES = {
+    'parallel_query_time': 'par_query_time',
+    'parallel_combination_time': 'par_combination_time',
+    'parallel_total_time': 'par_total_time',
+    'parallel_memory': 'par_memory',
+    'parallel_cpu': 'par_cpu',
+    'parallel_results': 'par_results',
+    'seq_total_time': 'seq_query_time',
+    'seq_final_time': 'seq_total_time',
+}
+
+FORMATS = {
+    'parquet': 'parquet',
+    'feather': 'ipc',
+}
+
+MANIFEST_COLUMNS = ['run_id', 'git_commit', 'workload', 'source', 'format', 'extra_columns', 'imported_at']
+MANIFEST_FILE = 'manifest.parquet'
+RESULTS_DIR = 'results'
+
+
+def normalize_results(df):
+    """Map a raw benchmark frame onto the canonical schema.
+
+    Columns outside the canonical schema are appended as float64 extra columns
+    after the canonical ones; non-numeric extra columns are rejected.
+    """
+    renamed = df.rename(columns=COLUMN_ALIASES)
+    extra = [c for c in renamed.columns if c not in CANONICAL_SCHEMA.names and c != 'run_id']
+    non_numeric = [c for c in extra if not pd.api.types.is_numeric_dtype(renamed[c])]
+    if non_numeric:
+        raise ValueError(f"Non-numeric result columns: {', '.join(non_numeric)}")
+
+    if 'speedup_ratio' not in renamed.columns and \
+            {'super_time', 'par_total_time'} <= set(renamed.columns):
+        renamed['speedup_ratio'] = renamed['super_time'] / renamed['par_total_time']
+
+    normalized = pd.DataFrame(index=renamed.index)
+    for field in CANONICAL_SCHEMA:
+        if field.name in renamed.columns:
+            normalized[field.name] = renamed[field.name]
+        else:
+            normalized[field.name] = pd.Series(pd.NA, index=renamed.index, dtype='Float64')
+    for column in extra:
+        normalized[column] = renamed[column].astype(float)
+    return pa.Table.from_pandas(normalized, schema=_schema(extra), preserve_index=False)
+
+
+def _schema(extra_columns):
+    fields = list(CANONICAL_SCHEMA) + [pa.field(c, pa.float64()) for c in extra_columns]
+    return pa.schema(fields)
+
+
+def _format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported store format '{fmt}', expected one of {sorted(FORMATS)}")
+    return FORMATS[fmt]
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('run_id', pa.string())]), flavor='hive')
+
+
+def read_manifest(store=DEFAULT_STORE):
+    """Return the run manifest as a DataFrame (empty if the store is new)."""
+    path = os.path.join(store, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=MANIFEST_COLUMNS)
+    manifest = pq.read_table(path, memory_map=True).to_pandas()
+    if 'extra_columns' not in manifest.columns:
+        manifest['extra_columns'] = '[]'
+    return manifest[MANIFEST_COLUMNS]
+
+
+def result_columns(store=DEFAULT_STORE):
+    """Canonical columns followed by every extra column recorded by any run."""
+    extra = []
+    for columns in read_manifest(store)['extra_columns']:
+        extra += [c for c in json.loads(columns) if c not in extra]
+    return CANONICAL_SCHEMA.names + extra
+
+
+def _write_manifest(store, manifest):
+    pq.write_table(pa.Table.from_pandas(manifest, preserve_index=False),
+                   os.path.join(store, MANIFEST_FILE))
+
+
+def import_results(csv_path, run_id, git_commit='', workload=None, store=DEFAULT_STORE, fmt='parquet'):
+    """Normalize a benchmark CSV and write it as the partition for `run_id`.
+
+    Re-importing an existing run id replaces its partition and manifest entry.
+    """
+    file_format = _format(fmt)
+    manifest = read_manifest(store)
+    existing = manifest[manifest['format'] != fmt]['format'].unique()
+    if len(existing) > 0:
+        raise ValueError(f"Store at {store} already uses format '{existing[0]}'")
+
+    table = normalize_results(pd.read_csv(csv_path))
+    extra_columns = table.schema.names[len(CANONICAL_SCHEMA):]
+    table = table.append_column('run_id', pa.array([run_id] * table.num_rows, pa.string()))
+
+    results_dir = os.path.join(store, RESULTS_DIR)
+    partition_dir = os.path.join(results_dir, f'run_id={run_id}')
+    if os.path.isdir(partition_dir):
+        shutil.rmtree(partition_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    ds.write_dataset(table, results_dir, format=file_format, partitioning=_partitioning(),
+                     basename_template=f'{run_id}-{{i}}.{fmt}',
+                     existing_data_behavior='overwrite_or_ignore')
+
+    entry = pd.DataFrame([{
+        'run_id': run_id,
+        'git_commit': git_commit,
+        'workload': json.dumps(workload or {}, sort_keys=True),
+        'source': os.path.basename(csv_path),
+        'format': fmt,
+        'extra_columns': json.dumps(extra_columns),
+        'imported_at': datetime.now(timezone.utc).isoformat(),
+    }])
+    manifest = pd.concat([manifest[manifest['run_id'] != run_id], entry], ignore_index=True)
+    _write_manifest(store, manifest)
+    return table.num_rows
+
+
+def find_runs(store=DEFAULT_STORE, git_commit=None, **workload):
+    """Return run ids matching a git commit and/or workload parameters."""
+    manifest = read_manifest(store)
+    if git_commit is not None:
+        manifest = manifest[manifest['git_commit'] == git_commit]
+    if workload:
+        params = manifest['workload'].map(json.loads)
+        mask = params.map(lambda p: all(str(p.get(k)) == str(v) for k, v in workload.items()))
+        manifest = manifest[mask]
+    return list(manifest['run_id'])
+
+
+def open_results(store=DEFAULT_STORE):
+    """Open the results dataset on a memory-mapped local filesystem.
+
+    The dataset schema is the union of all runs' columns (see result_columns).
+    """
+    manifest = read_manifest(store)
+    fmt = manifest['format'].iloc[0] if len(manifest) > 0 else 'parquet'
+    columns = result_columns(store)
+    schema = _schema(columns[len(CANONICAL_SCHEMA):]).append(pa.field('run_id', pa.string()))
+    return ds.dataset(os.path.join(store, RESULTS_DIR), schema=schema, format=_format(fmt),
+                      partitioning=_partitioning(),
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def load_runs(run_ids, columns, store=DEFAULT_STORE):
+    """Load `columns` for the given runs, touching only those partitions and columns."""
+    known = result_columns(store)
+    unknown = [c for c in columns if c != 'run_id' and c not in known]
+    if unknown:
+        raise ValueError(f"Unknown result columns: {', '.join(unknown)}")
+    wanted = ['run_id'] + [c for c in columns if c != 'run_id']
+    table = open_results(store).to_table(columns=wanted, filter=ds.field('run_id').isin(list(run_ids)))
+    return table.to_pandas()
+
+
+def compare_runs(baseline, candidate, metrics, store=DEFAULT_STORE):
+    """Summarize `metrics` for two runs side by side.
+
+    Returns one row per metric with the mean and median of each run and the
+    relative change of the candidate mean against the baseline mean.
+    """
+    df = load_runs([baseline, candidate], metrics, store)
+    rows = []
+    for metric in metrics:
+        base = df.loc[df['run_id'] == baseline, metric].dropna()
+        cand = df.loc[df['run_id'] == candidate, metric].dropna()
+        rows.append({
+            'metric': metric,
+            'baseline_mean': base.mean(),
+            'candidate_mean': cand.mean(),
+            'baseline_median': base.median(),
+            'candidate_median': cand.median(),
+            'change_pct': (cand.mean() - base.mean()) / base.mean() * 100 if base.mean() else float('nan'),
+        })
+    return pd.DataFrame(rows)
+
+
+def _parse_params(pairs):
+    params = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected key=value, got '{pair}'")
+        params[key] = value
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar store for nectar-bee benchmark results')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='Store directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Import a benchmark CSV as a run')
+    imp.add_argument('csv')
+    imp.add_argument('--run-id', required=True)
+    imp.add_argument('--git-commit', default='')
+    imp.add_argument('--param', action='append', help='Workload parameter as key=value')
+    imp.add_argument('--format', default='parquet', choices=sorted(FORMATS))
+
+    lst = sub.add_parser('list', help='List stored runs')
+    lst.add_argument('--git-commit')
+    lst.add_argument('--param', action='append', help='Filter on workload parameter key=value')
+
+    cmp_ = sub.add_parser('compare', help='Compare two runs')
+    cmp_.add_argument('baseline')
+    cmp_.add_argument('candidate')
+    cmp_.add_argument('--metrics', nargs='+', default=['super_time', 'par_total_time', 'speedup_ratio'])
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        rows = import_results(args.csv, args.run_id, args.git_commit, _parse_params(args.param),
+                              store=args.store, fmt=args.format)
+        print(f"Imported {rows} rows from {args.csv} as run '{args.run_id}'")
+    elif args.command == 'list':
+        run_ids = find_runs(args.store, args.git_commit, **_parse_params(args.param))
+        manifest = read_manifest(args.store)
+        print(manifest[manifest['run_id'].isin(run_ids)].to_string(index=False))
+    elif args.command == 'compare':
+        print(f"=== {args.baseline} vs {args.candidate} ===")
+        print(compare_runs(args.baseline, args.candidate, args.metrics, args.store).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
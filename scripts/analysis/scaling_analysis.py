@@ -0,0 +1,259 @@
+"""Empirical complexity fitting for benchmark sweeps.
+
+Takes sweep results (a metric such as time or memory against a size parameter
+such as number of subqueries, patterns, windows or dataset size), fits
+linear, n log n, quadratic and power-law models, reports the fitted power-law
+exponent with a confidence interval and flags super-linear growth. Observed
+and fitted curves are plotted on log-log axes, extrapolated to larger sizes.
+
+The sweep can be a CSV with one row per measurement, or the results store
+where each run carries its size as a workload parameter.
+
+Usage:
+    python3 scaling_analysis.py sweep.csv --x n_subqueries --y diff_time par_combination_time
+    python3 scaling_analysis.py --store --x n_patterns --y par_total_time --extrapolate 1000 10000
+"""
+
+import argparse
+import json
+import os
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(SCRIPT_DIR, '..', '..', 'docs', 'images')
+
+# Model name -> basis function of n. Each model is fitted as y = a * f(n) + b.
+MODELS = {
+    'linear': lambda n: n,
+    'n log n': lambda n: n * np.log(n),
+    'quadratic': lambda n: n ** 2,
+}
+
+# Models whose basis is only defined for n > 0.
+LOG_MODELS = {'n log n'}
+
+SUPERLINEAR_TOLERANCE = 0.1
+
+
+def fit_basis_model(n, y, basis):
+    """Least-squares fit of y = a * basis(n) + b; returns (params, predict, aic)."""
+    X = np.column_stack([basis(n), np.ones_like(n)])
+    params, *_ = np.linalg.lstsq(X, y, rcond=None)
+    rss = float(np.sum((y - X @ params) ** 2))
+    return params, (lambda m: params[0] * basis(m) + params[1]), _aic(rss, len(n), 2)
+
+
+def fit_power_law(n, y, confidence=0.95):
+    """Fit y = c * n^k by regression in log-log space.
+
+    Only points with n > 0 and y > 0 can be used; `dropped` counts the others.
+    Returns None when fewer than three distinct sizes remain. Otherwise returns
+    the exponent k with its confidence interval, a predictor and the AIC
+    computed on the original scale.
+    """
+    mask = (n > 0) & (y > 0)
+    if len(np.unique(n[mask])) < 3:
+        return None
+    log_n, log_y = np.log(n[mask]), np.log(y[mask])
+    result = stats.linregress(log_n, log_y)
+    dof = max(len(log_n) - 2, 1)
+    half_width = stats.t.ppf((1 + confidence) / 2, dof) * result.stderr
+    coef = np.exp(result.intercept)
+    predict = lambda m: coef * m ** result.slope
+    rss = float(np.sum((y[mask] - predict(n[mask])) ** 2))
+    return {
+        'exponent': result.slope,
+        'exponent_lower': result.slope - half_width,
+        'exponent_upper': result.slope + half_width,
+        'r_squared': result.rvalue ** 2,
+        'predict': predict,
+        'mask': mask,
+        'dropped': int((~mask).sum()),
+        'aic': _aic(rss, int(mask.sum()), 2),
+    }
+
+
+def _aic(rss, n_points, n_params):
+    if rss <= 0:
+        return -np.inf
+    return n_points * np.log(rss / n_points) + 2 * n_params
+
+
+def analyze_scaling(n, y, confidence=0.95):
+    """Fit every model to one metric and classify its growth.
+
+    Growth is 'super-linear' when the lower bound of the power-law exponent
+    exceeds 1 + SUPERLINEAR_TOLERANCE, 'sub-linear' when the upper bound is
+    below 1 - SUPERLINEAR_TOLERANCE, 'linear' otherwise, and 'unknown' when the
+    power law cannot be fitted.
+
+    Log-based models are fitted on n > 0 only and the power law on n > 0 and
+    y > 0; every fit reports how many points it dropped. Models are ranked by
+    AIC over the points that every fitted model covers, so the AICs compare
+    like with like.
+    """
+    n = np.asarray(n, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~(np.isnan(n) | np.isnan(y))
+    n, y = n[mask], y[mask]
+    if len(np.unique(n)) < 3:
+        raise ValueError('Need measurements at three or more distinct sizes to fit a scaling model')
+
+    fits = {}
+    for name, basis in MODELS.items():
+        domain = n > 0 if name in LOG_MODELS else np.ones_like(n, dtype=bool)
+        if len(np.unique(n[domain])) < 3:
+            continue
+        params, predict, _ = fit_basis_model(n[domain], y[domain], basis)
+        fits[name] = {'params': params, 'predict': predict, 'mask': domain, 'dropped': int((~domain).sum())}
+    power = fit_power_law(n, y, confidence)
+    if power is not None:
+        fits['power law'] = {'params': np.array([power['exponent']]), 'predict': power['predict'],
+                             'mask': power['mask'], 'dropped': power['dropped']}
+
+    common = np.logical_and.reduce([fit['mask'] for fit in fits.values()])
+    for fit in fits.values():
+        rss = float(np.sum((y[common] - fit['predict'](n[common])) ** 2))
+        fit['aic'] = _aic(rss, int(common.sum()), 2)
+
+    if power is None:
+        growth = 'unknown'
+    elif power['exponent_lower'] > 1 + SUPERLINEAR_TOLERANCE:
+        growth = 'super-linear'
+    elif power['exponent_upper'] < 1 - SUPERLINEAR_TOLERANCE:
+        growth = 'sub-linear'
+    else:
+        growth = 'linear'
+
+    return {
+        'n': n,
+        'y': y,
+        'fits': fits,
+        'best_model': min(fits, key=lambda name: fits[name]['aic']),
+        'power': power,
+        'growth': growth,
+    }
+
+
+def load_sweep_csv(path, x, metrics):
+    df = pd.read_csv(path)
+    missing = [c for c in [x, *metrics] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found in {path}: {', '.join(missing)}")
+    return df[[x, *metrics]]
+
+
+def load_sweep_store(x, metrics, store):
+    """Build a sweep from the results store, reading `x` from each run's workload."""
+    from results_store import load_runs, read_manifest
+
+    manifest = read_manifest(store)
+    sizes = {row.run_id: json.loads(row.workload).get(x) for row in manifest.itertuples()}
+    sizes = {run_id: float(size) for run_id, size in sizes.items() if size is not None}
+    if not sizes:
+        raise ValueError(f"No stored run has workload parameter '{x}'")
+    df = load_runs(list(sizes), metrics, store)
+    df[x] = df['run_id'].map(sizes)
+    return df[[x, *metrics]]
+
+
+def plot_scaling(analyses, x, extrapolate_to=None, output=None):
+    """Plot observed points and every fitted model per metric on log-log axes."""
+    fig, axes = plt.subplots(1, len(analyses), figsize=(7 * len(analyses), 6), squeeze=False)
+    for ax, (metric, analysis) in zip(axes[0], analyses.items()):
+        n, y = analysis['n'], analysis['y']
+        upper = max([n.max(), *(extrapolate_to or [])])
+        grid = np.geomspace(max(n.min(), 1), upper, 200)
+        ax.scatter(n, y, color='black', s=30, zorder=3, label='Observed')
+        for name, fit in analysis['fits'].items():
+            style = '-' if name == analysis['best_model'] else '--'
+            ax.plot(grid, fit['predict'](grid), style, linewidth=2 if style == '-' else 1, label=name)
+        if extrapolate_to:
+            ax.axvline(n.max(), color='grey', linestyle=':', alpha=0.7, label='Extrapolation')
+        power = analysis['power']
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel(x)
+        ax.set_ylabel(metric)
+        if power is None:
+            ax.set_title(f"{metric} ({analysis['growth']})")
+        else:
+            ax.set_title(f"{metric}: k={power['exponent']:.2f} "
+                         f"[{power['exponent_lower']:.2f}, {power['exponent_upper']:.2f}] ({analysis['growth']})")
+        ax.legend()
+        ax.grid(True, alpha=0.3, which='both')
+    fig.suptitle(f'Scaling Analysis vs {x}', fontsize=16)
+    fig.tight_layout()
+    if output:
+        fig.savefig(output, dpi=300, bbox_inches='tight')
+    return fig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fit empirical complexity models to benchmark sweeps')
+    parser.add_argument('csv', nargs='?', help='Sweep CSV (omit with --store)')
+    parser.add_argument('--store', nargs='?', const='', default=None,
+                        help='Read the sweep from the results store (optionally give its path)')
+    parser.add_argument('--x', required=True, help='Size column / workload parameter')
+    parser.add_argument('--y', nargs='+', default=['par_total_time', 'par_combination_time'],
+                        help='Metric columns to fit')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--extrapolate', nargs='+', type=float, default=[],
+                        help='Sizes to extrapolate each metric to')
+    parser.add_argument('--output', default=None, help='Plot path (default docs/images/scaling_<x>.png)')
+    parser.add_argument('--no-show', action='store_true', help='Do not open the plot window')
+    args = parser.parse_args(argv)
+
+    if args.store is not None:
+        from results_store import DEFAULT_STORE
+        df = load_sweep_store(args.x, args.y, args.store or DEFAULT_STORE)
+    elif args.csv:
+        df = load_sweep_csv(args.csv, args.x, args.y)
+    else:
+        parser.error('either a sweep CSV or --store is required')
+
+    print("=" * 60)
+    print(f"SCALING ANALYSIS vs {args.x} ({len(df)} measurements)")
+    print("=" * 60)
+
+    analyses = {}
+    flagged = []
+    for metric in args.y:
+        analysis = analyze_scaling(df[args.x], df[metric], args.confidence)
+        analyses[metric] = analysis
+        power = analysis['power']
+        print(f"\n{metric}:")
+        if power is None:
+            print("  power-law exponent: n/a (fewer than three sizes with n > 0 and y > 0)")
+        else:
+            print(f"  power-law exponent: {power['exponent']:.3f} "
+                  f"({args.confidence:.0%} CI [{power['exponent_lower']:.3f}, {power['exponent_upper']:.3f}], "
+                  f"R²={power['r_squared']:.3f})")
+        print(f"  growth: {analysis['growth']}")
+        print(f"  best model (AIC): {analysis['best_model']}")
+        for name, fit in sorted(analysis['fits'].items(), key=lambda item: item[1]['aic']):
+            dropped = f" ({fit['dropped']} point(s) outside its domain dropped)" if fit['dropped'] else ''
+            print(f"    {name:<10} AIC={fit['aic']:.2f}{dropped}")
+        for size in args.extrapolate:
+            best = analysis['fits'][analysis['best_model']]['predict']
+            power_prediction = '' if power is None else f" (power law {power['predict'](np.array([size]))[0]:.3f})"
+            print(f"  predicted at {args.x}={size:g}: {best(np.array([size]))[0]:.3f}{power_prediction}")
+        if analysis['growth'] == 'super-linear':
+            flagged.append(metric)
+
+    if flagged:
+        print(f"\nWARNING: super-linear growth in {', '.join(flagged)}")
+
+    output = args.output or os.path.join(IMAGES_DIR, f'scaling_{args.x}.png')
+    plot_scaling(analyses, args.x, args.extrapolate, output)
+    if not args.no_show and matplotlib.get_backend().lower() != 'agg':
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 export { QueryDiff } from './lib/QueryDiff';
+export { ResourceSampler } from './lib/ResourceSampler';
+export { TermDictionary } from './lib/TermDictionary';
+export { MultiQueryPlanner } from './lib/MultiQueryPlanner';
+export { PaneEvaluator } from './lib/PaneEvaluator';
 
 export {
   normalizeQuery,
@@ -12,16 +16,50 @@ export {
   extractStreamInfo,
   extractRSPQLBasicGraphPatterns,
   buildRSPQLMinusQuery,
-  normalizeRSPQLQuery
+  normalizeRSPQLQuery,
+  splitTriplePatterns
 } from './utils/queryUtils';
 
+export {
+  tokenizeTerms,
+  expandPrefixedName,
+  expandTerm,
+  compactTerm,
+  compactPattern
+} from './utils/termUtils';
+
+export {
+  extractFilters,
+  removeFilters,
+  parseFilterConstraints,
+  extractFilterConstraints,
+  isFilterImplied,
+  areFiltersImplied,
+  addFilters,
+  compareValues
+} from './utils/filterUtils';
+
 export type {
   ProcessedQuery,
   RSPQLQuery,
   QueryDiffOptions,
   QueryDifference,
   NectarResult,
-  BatchNectarResult
+  BatchNectarResult,
+  ResourceSample,
+  GCEvent,
+  ResourceTrace,
+  ResourceSamplerOptions,
+  MultiQueryPlannerOptions,
+  SharedSubPlan,
+  SuperQueryPlan,
+  MultiQueryPlan,
+  FilterOperator,
+  FilterConstraint,
+  StreamQuad,
+  SolutionBinding,
+  WindowResult,
+  PaneEvaluatorOptions
 } from './types';
 
 export { QueryDiff as default } from './lib/QueryDiff';
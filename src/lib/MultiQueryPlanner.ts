@@ -0,0 +1,507 @@
+import {
+  extractBasicGraphPatterns,
+  extractPrefixes,
+  extractRSPQLBasicGraphPatterns,
+  extractStreamInfo,
+  extractVariables,
+  isRSPQLQuery,
+  normalizeQuery,
+  normalizeRSPQLQuery
+} from '../utils/queryUtils';
+import { areFiltersImplied, extractFilterConstraints, isFilterImplied } from '../utils/filterUtils';
+import {
+  FilterConstraint,
+  MultiQueryPlan,
+  MultiQueryPlannerOptions,
+  SharedSubPlan,
+  SuperQueryPlan
+} from '../types';
+import { compactPattern } from '../utils/termUtils';
+import { TermDictionary } from './TermDictionary';
+
+type PatternKey = number | string;
+
+interface StreamWindow {
+    name: string;
+    stream: string;
+    range: number;
+    step: number;
+    output: string;
+}
+
+interface PlannedSuperQuery {
+    index: number;
+    prefixes: Record<string, string>;
+    windowKey: string;
+    window?: StreamWindow;
+    filters: FilterConstraint[];
+    residual: Map<PatternKey, string>;
+    covered: string[];
+}
+
+interface PlannedSubquery {
+    keys: Set<PatternKey>;
+    filters: FilterConstraint[];
+}
+
+interface SharedGroup {
+    signature: string;
+    keys: PatternKey[];
+    keySet: Set<PatternKey>;
+    support: number[];
+}
+
+/**
+ * Plans the evaluation of many super queries at once. Pattern groups that at
+ * least `minSharingQueries` super queries have in common, and that no
+ * registered subquery already covers, become shared intermediate queries that
+ * are evaluated once. Shared groups form a DAG: a group that extends smaller
+ * shared groups depends on them, and its query only evaluates its own
+ * patterns; its solutions are the join of that query with its parents'
+ * outputs. Each super query is then answered by joining the shared groups it
+ * uses with its nectar residual.
+ *
+ * Patterns are compared through the TermDictionary, so variables must have the
+ * same name to be shared. RSP-QL super queries are only grouped with queries
+ * over the same streams and RANGE/STEP, and their shared and residual queries
+ * are emitted as RSP-QL queries over that window.
+ *
+ * FILTERs follow the same containment rule as QueryDiff: a subquery only
+ * covers a super query's patterns when its FILTERs are implied by the super
+ * query's. Super query FILTERs bound by a residual are pushed into the nectar
+ * query; a shared group gets the FILTERs bound by its own patterns that every
+ * query it serves implies. Whatever a query's inputs do not already enforce is
+ * left in its `joinFilters`, to apply after the join.
+ *
+ * Candidate groups are ranked by the pattern evaluations they save,
+ * `|patterns| * (queries - 1)`, and only the best `maxSharedGroups` per
+ * partition are considered. Sharing trades pattern evaluations for joins, so
+ * the plan reports `joinOperations` next to `patternEvaluations`.
+ */
+export class MultiQueryPlanner {
+    private superQueries: string[];
+    private subqueries: string[];
+    private options: MultiQueryPlannerOptions;
+    private terms: TermDictionary;
+
+    constructor(superQueries: string[], subqueries: string[] = [], options?: Partial<MultiQueryPlannerOptions>) {
+        this.options = {
+          minSharedPatterns: 1,
+          minSharingQueries: 2,
+          maxSharedGroups: 64,
+          ...options
+        };
+
+        this.superQueries = superQueries.map(query => this.normalize(query));
+        this.subqueries = subqueries.map(query => this.normalize(query));
+        this.terms = new TermDictionary();
+    }
+
+    public plan(): MultiQueryPlan {
+        const subqueries: PlannedSubquery[] = this.subqueries.map(subquery => {
+            const prefixes = extractPrefixes(subquery);
+            return {
+                keys: new Set(this.extractPatterns(subquery).map(pattern => this.patternKey(pattern, prefixes))),
+                filters: extractFilterConstraints(subquery)
+            };
+        });
+
+        const planned = this.superQueries.map((query, index) => this.prepare(query, index, subqueries));
+
+        const partitions = new Map<string, PlannedSuperQuery[]>();
+        for (const query of planned) {
+            const partition = partitions.get(query.windowKey) || [];
+            partition.push(query);
+            partitions.set(query.windowKey, partition);
+        }
+
+        const sharedPlans: SharedSubPlan[] = [];
+        const queryPlans: SuperQueryPlan[] = [];
+        for (const partition of partitions.values()) {
+            this.planPartition(partition, sharedPlans, queryPlans);
+        }
+
+        queryPlans.sort((a, b) => a.superQueryIndex - b.superQueryIndex);
+
+        const patternEvaluationsWithoutSharing = planned
+            .reduce((total, query) => total + query.residual.size, 0);
+        const patternEvaluations = sharedPlans.reduce((total, plan) => total + plan.ownPatterns.length, 0) +
+            queryPlans.reduce((total, plan) => total + plan.residualPatterns.length, 0);
+        // A plan node with n inputs costs n - 1 binary joins.
+        const joinOperations = sharedPlans
+            .reduce((total, plan) => total + Math.max(0, plan.dependsOn.length + (plan.query ? 1 : 0) - 1), 0) +
+            queryPlans.reduce((total, plan) => total + Math.max(0, plan.sharedInputs.length +
+              (plan.nectarQuery ? 1 : 0) + (plan.coveredPatterns.length > 0 ? 1 : 0) - 1), 0);
+
+        return {
+            sharedPlans,
+            queryPlans,
+            patternEvaluations,
+            patternEvaluationsWithoutSharing,
+            joinOperations
+        };
+    }
+
+    private planPartition(queries: PlannedSuperQuery[], sharedPlans: SharedSubPlan[], queryPlans: SuperQueryPlan[]): void {
+        let groups = this.findSharedGroups(queries);
+        const subsets = this.subsetRelation(groups);
+        let chosen: Map<PlannedSuperQuery, SharedGroup[]>;
+        let parents: Map<SharedGroup, SharedGroup[]>;
+        let users: Map<SharedGroup, Set<number>>;
+
+        // Queries pick their groups independently, so a group can end up
+        // serving a single query. Drop such groups and re-select until every
+        // emitted group is shared by at least minSharingQueries queries.
+        for (;;) {
+            chosen = this.selectGroups(queries, groups);
+            parents = this.directSubgroups(groups, subsets);
+            users = this.groupUsers(queries, chosen, parents);
+            const kept = groups.filter(group => !users.has(group) || users.get(group)!.size >= this.options.minSharingQueries);
+            if (kept.length === groups.length) {
+                break;
+            }
+            groups = kept;
+        }
+
+        // Shared queries are written in the vocabulary of the partition's
+        // first query, like QueryDiff writes MINUS patterns.
+        const prefixes = queries[0].prefixes;
+        const byIndex = new Map(queries.map(query => [query.index, query]));
+        const pushed = new Map<SharedGroup, FilterConstraint[]>();
+        const ids = new Map<SharedGroup, string>();
+        const ordered = groups
+            .filter(group => users.has(group))
+            .sort((a, b) => a.keys.length - b.keys.length);
+        for (const group of ordered) {
+            const id = `shared-${sharedPlans.length}`;
+            ids.set(group, id);
+            const dependsOn = parents.get(group) || [];
+            const inherited = new Set(dependsOn.flatMap(parent => parent.keys));
+            const ownPatterns = group.keys.filter(key => !inherited.has(key)).map(key => this.patternText(key, prefixes));
+            const groupUsers = [...users.get(group)!].map(index => byIndex.get(index)!);
+            const filters = this.filtersBoundBy(ownPatterns, groupUsers.flatMap(query => query.filters))
+                .filter(filter => groupUsers.every(query => isFilterImplied(filter, query.filters)));
+            pushed.set(group, filters);
+            sharedPlans.push({
+                id,
+                patterns: group.keys.map(key => this.patternText(key, prefixes)),
+                ownPatterns,
+                dependsOn: dependsOn.map(parent => ids.get(parent)!),
+                usedBy: [...users.get(group)!].sort((a, b) => a - b),
+                query: ownPatterns.length > 0
+                  ? this.buildQuery(ownPatterns, prefixes, queries[0].window, id, filters)
+                  : ''
+            });
+        }
+
+        const ancestors = (group: SharedGroup): SharedGroup[] =>
+            [group, ...(parents.get(group) || []).flatMap(ancestors)];
+
+        for (const query of queries) {
+            const inputs = chosen.get(query)!;
+            const sharedKeys = new Set(inputs.flatMap(group => group.keys));
+            const residualPatterns = [...query.residual.entries()]
+                .filter(([key]) => !sharedKeys.has(key))
+                .map(([, pattern]) => pattern);
+            const residualFilters = residualPatterns.length > 0 ? this.filtersBoundBy(residualPatterns, query.filters) : [];
+            const enforced = [...residualFilters, ...inputs.flatMap(ancestors).flatMap(group => pushed.get(group)!)];
+
+            queryPlans.push({
+                superQueryIndex: query.index,
+                sharedInputs: inputs.map(group => ids.get(group)!),
+                coveredPatterns: query.covered,
+                residualPatterns,
+                nectarQuery: residualPatterns.length > 0
+                  ? this.buildQuery(residualPatterns, query.prefixes, query.window, query.window?.output, residualFilters)
+                  : '',
+                joinFilters: query.filters
+                    .filter(filter => !isFilterImplied(filter, enforced))
+                    .map(filter => filter.expression)
+            });
+        }
+    }
+
+    /**
+     * Greedy choice of disjoint shared groups per query, largest groups first.
+     */
+    private selectGroups(queries: PlannedSuperQuery[], groups: SharedGroup[]): Map<PlannedSuperQuery, SharedGroup[]> {
+        const chosen = new Map<PlannedSuperQuery, SharedGroup[]>();
+        for (const query of queries) {
+            const remaining = new Set(query.residual.keys());
+            const inputs: SharedGroup[] = [];
+            const candidates = groups
+                .filter(group => group.support.includes(query.index))
+                .sort((a, b) => b.keys.length - a.keys.length);
+
+            for (const group of candidates) {
+                if (group.keys.every(key => remaining.has(key))) {
+                    group.keys.forEach(key => remaining.delete(key));
+                    inputs.push(group);
+                }
+            }
+            chosen.set(query, inputs);
+        }
+        return chosen;
+    }
+
+    /**
+     * Super queries served by each group, either directly or through a
+     * dependent group in the DAG. Groups that serve no query are absent.
+     */
+    private groupUsers(
+        queries: PlannedSuperQuery[],
+        chosen: Map<PlannedSuperQuery, SharedGroup[]>,
+        parents: Map<SharedGroup, SharedGroup[]>
+    ): Map<SharedGroup, Set<number>> {
+        const users = new Map<SharedGroup, Set<number>>();
+        const markUsed = (group: SharedGroup, index: number): void => {
+            const groupUsers = users.get(group) || new Set<number>();
+            if (groupUsers.has(index)) {
+                return;
+            }
+            groupUsers.add(index);
+            users.set(group, groupUsers);
+            (parents.get(group) || []).forEach(parent => markUsed(parent, index));
+        };
+
+        for (const query of queries) {
+            chosen.get(query)!.forEach(group => markUsed(group, query.index));
+        }
+        return users;
+    }
+
+    /**
+     * Candidate shared groups are the pairwise intersections of the residual
+     * pattern sets, closed under intersection so that patterns common to
+     * three or more queries are found even when no pair has exactly them in
+     * common. Each group is kept with every query that contains it. After the
+     * pairwise pass and after every closure round only the `maxSharedGroups`
+     * most beneficial groups are kept, which bounds the closure.
+     */
+    private findSharedGroups(queries: PlannedSuperQuery[]): SharedGroup[] {
+        // Queries containing each pattern, as bitsets over partition positions.
+        const words = Math.ceil(queries.length / 32);
+        const postings = new Map<PatternKey, Uint32Array>();
+        queries.forEach((query, position) => {
+            for (const key of query.residual.keys()) {
+                const bits = postings.get(key) || new Uint32Array(words);
+                bits[position >>> 5] |= 1 << (position & 31);
+                postings.set(key, bits);
+            }
+        });
+
+        const seen = new Set<string>();
+        const addGroup = (keys: PatternKey[]): SharedGroup | undefined => {
+            if (keys.length < this.options.minSharedPatterns) {
+                return undefined;
+            }
+            keys.sort((a, b) => String(a).localeCompare(String(b)));
+            const signature = keys.map(String).join('|');
+            if (seen.has(signature)) {
+                return undefined;
+            }
+            seen.add(signature);
+
+            const members = Uint32Array.from(postings.get(keys[0])!);
+            for (const key of keys.slice(1)) {
+                const bits = postings.get(key)!;
+                for (let word = 0; word < words; word++) {
+                    members[word] &= bits[word];
+                }
+            }
+            const support = queries
+                .filter((_, position) => (members[position >>> 5] & (1 << (position & 31))) !== 0)
+                .map(query => query.index);
+            if (support.length < 2) {
+                return undefined;
+            }
+            return { signature, keys, keySet: new Set(keys), support };
+        };
+
+        const pairwise: SharedGroup[] = [];
+        for (let i = 0; i < queries.length; i++) {
+            for (let j = i + 1; j < queries.length; j++) {
+                const other = queries[j].residual;
+                const group = addGroup([...queries[i].residual.keys()].filter(key => other.has(key)));
+                if (group) {
+                    pairwise.push(group);
+                }
+            }
+        }
+
+        let groups = this.mostBeneficial(pairwise);
+        let frontier = groups;
+        while (frontier.length > 0) {
+            const added: SharedGroup[] = [];
+            for (const group of frontier) {
+                for (const other of groups) {
+                    const intersection = addGroup(group.keys.filter(key => other.keySet.has(key)));
+                    if (intersection) {
+                        added.push(intersection);
+                    }
+                }
+            }
+            groups = this.mostBeneficial([...groups, ...added]);
+            const kept = new Set(groups);
+            frontier = added.filter(group => kept.has(group));
+        }
+        // Groups of fewer queries only seed the closure.
+        return groups.filter(group => group.support.length >= this.options.minSharingQueries);
+    }
+
+    /**
+     * The `maxSharedGroups` groups that save the most pattern evaluations.
+     */
+    private mostBeneficial(groups: SharedGroup[]): SharedGroup[] {
+        const benefit = (group: SharedGroup): number => group.keys.length * (group.support.length - 1);
+        return groups
+            .sort((a, b) => benefit(b) - benefit(a) || b.keys.length - a.keys.length || a.signature.localeCompare(b.signature))
+            .slice(0, this.options.maxSharedGroups);
+    }
+
+    /**
+     * For every group, the groups strictly contained in it.
+     */
+    private subsetRelation(groups: SharedGroup[]): Map<SharedGroup, Set<SharedGroup>> {
+        return new Map(groups.map(group => [
+            group,
+            new Set(groups.filter(other =>
+                other.keys.length < group.keys.length && other.keys.every(key => group.keySet.has(key))))
+        ]));
+    }
+
+    /**
+     * Edges of the shared-group DAG: for every group, the largest shared groups
+     * strictly contained in it (the Hasse diagram of the subset order).
+     */
+    private directSubgroups(
+        groups: SharedGroup[],
+        subsets: Map<SharedGroup, Set<SharedGroup>>
+    ): Map<SharedGroup, SharedGroup[]> {
+        const live = new Set(groups);
+        const parents = new Map<SharedGroup, SharedGroup[]>();
+        for (const group of groups) {
+            const contained = [...subsets.get(group)!].filter(subset => live.has(subset));
+            parents.set(group, contained.filter(subset => !contained.some(other => subsets.get(other)!.has(subset))));
+        }
+        return parents;
+    }
+
+    /**
+     * Distinct constraints of `filters` whose variables are all bound by
+     * `patterns`, variable-free ones included.
+     */
+    private filtersBoundBy(patterns: string[], filters: FilterConstraint[]): FilterConstraint[] {
+        const bound = new Set(patterns.flatMap(pattern => extractVariables(pattern)));
+        const seen = new Set<string>();
+        return filters.filter(filter => {
+            if (seen.has(filter.expression) || !filter.variables.every(v => bound.has(v))) {
+                return false;
+            }
+            seen.add(filter.expression);
+            return true;
+        });
+    }
+
+    private prepare(query: string, index: number, subqueries: PlannedSubquery[]): PlannedSuperQuery {
+        const prefixes = extractPrefixes(query);
+        const filters = extractFilterConstraints(query);
+        const residual = new Map<PatternKey, string>();
+        const covered: string[] = [];
+
+        const coveredKeys = new Set<PatternKey>();
+        subqueries
+            .filter(subquery => areFiltersImplied(subquery.filters, filters))
+            .forEach(subquery => subquery.keys.forEach(key => coveredKeys.add(key)));
+
+        for (const pattern of this.extractPatterns(query)) {
+            const key = this.patternKey(pattern, prefixes);
+            if (coveredKeys.has(key)) {
+                covered.push(pattern);
+            } else if (!residual.has(key)) {
+                residual.set(key, pattern);
+            }
+        }
+
+        let windowKey = '';
+        let window: StreamWindow | undefined;
+        if (isRSPQLQuery(query)) {
+            const info = extractStreamInfo(query);
+            windowKey = `${info.streamSources.join(',')}|${info.windowRange}|${info.windowStep}`;
+            const [name, stream] = Object.entries(info.namedWindows)[0] || [];
+            if (name) {
+                window = {
+                    name,
+                    stream,
+                    range: info.windowRange,
+                    step: info.windowStep,
+                    output: info.outputStream || 'output'
+                };
+            }
+        }
+
+        return { index, prefixes, windowKey, window, filters, residual, covered };
+    }
+
+    private extractPatterns(query: string): string[] {
+        const patterns = isRSPQLQuery(query)
+          ? extractRSPQLBasicGraphPatterns(query)
+          : extractBasicGraphPatterns(query);
+        return patterns.filter(pattern => pattern.trim().length > 0);
+    }
+
+    private patternKey(pattern: string, prefixes: Record<string, string>): PatternKey {
+        const encoded = this.terms.encodePattern(pattern, prefixes);
+        return encoded ? TermDictionary.patternKey(encoded) : normalizeQuery(pattern);
+    }
+
+    private patternText(key: PatternKey, prefixes: Record<string, string>): string {
+        return typeof key === 'number'
+          ? compactPattern(Array.from(TermDictionary.unpackKey(key), id => this.terms.lookup(id)!), prefixes)
+          : key;
+    }
+
+    /**
+     * SPARQL query over `patterns`, or for a windowed partition an RSP-QL
+     * query registered as `output` over the same window as its super queries.
+     */
+    private buildQuery(
+        patterns: string[],
+        prefixes: Record<string, string>,
+        window?: StreamWindow,
+        output?: string,
+        filters: FilterConstraint[] = []
+    ): string {
+        const prefixSection = Object.entries(prefixes)
+            .map(([prefix, uri]) => `PREFIX ${prefix}: <${uri}>`)
+            .join('\n');
+        const variables = [...new Set(patterns.flatMap(pattern => extractVariables(pattern)))];
+        const selectClause = variables.length > 0 ? `SELECT ${variables.map(v => `?${v}`).join(' ')}` : 'SELECT *';
+        const body = [patterns.join(' . '), ...filters.map(filter => `FILTER(${filter.expression})`)].join(' ');
+
+        let query = `${selectClause}\nWHERE { ${body} }`;
+        if (window) {
+            query = `REGISTER RStream <${output}> AS\n${selectClause}\n` +
+                `FROM NAMED WINDOW :${window.name} ON STREAM :${window.stream} [RANGE ${window.range} STEP ${window.step}]\n` +
+                `WHERE { WINDOW :${window.name} { ${body} } }`;
+        }
+
+        return prefixSection ? `${prefixSection}\n\n${query}` : query;
+    }
+
+    private normalize(query: string): string {
+        return isRSPQLQuery(query) ? normalizeRSPQLQuery(query) : normalizeQuery(query);
+    }
+
+    public getSuperQueries(): string[] {
+        return this.superQueries;
+    }
+
+    public getSubqueries(): string[] {
+        return this.subqueries;
+    }
+
+    public getOptions(): MultiQueryPlannerOptions {
+        return { ...this.options };
+    }
+}
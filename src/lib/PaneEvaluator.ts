@@ -0,0 +1,479 @@
+import {
+  extractBasicGraphPatterns,
+  extractPrefixes,
+  extractRSPQLBasicGraphPatterns,
+  extractStreamInfo,
+  isRSPQLQuery
+} from '../utils/queryUtils';
+import { compareValues, extractFilterConstraints } from '../utils/filterUtils';
+import { expandTerm, tokenizeTerms } from '../utils/termUtils';
+import {
+  FilterConstraint,
+  PaneEvaluatorOptions,
+  SolutionBinding,
+  StreamQuad,
+  WindowResult
+} from '../types';
+
+interface PaneMatch {
+    pane: number;
+    binding: SolutionBinding;
+}
+
+interface Pane {
+    quads: StreamQuad[];
+    matches: PaneMatch[][];
+}
+
+interface JoinIndex {
+    variables: string[];
+    buckets: Map<string, Map<number, PaneMatch[]>>;
+}
+
+interface CachedSolution {
+    minPane: number;
+    binding: SolutionBinding;
+}
+
+function gcd(a: number, b: number): number {
+    return b === 0 ? a : gcd(b, a % b);
+}
+
+/**
+ * Incremental evaluation of a nectar query over a sliding window
+ * `[RANGE r STEP s]`. The stream is cut into panes of gcd(r, s) time units.
+ * Every pane is matched against the query's triple patterns once, when it
+ * completes, and only the joins involving the new pane are computed
+ * (semi-naive delta join). The live panes' matches of each pattern are kept
+ * in hash indexes on the variables they are joined on, bucketed by pane, so a
+ * step only indexes the new pane and drops the evicted ones instead of
+ * re-indexing the whole window. Each solution remembers the oldest pane it was
+ * built from, so when the window slides the solutions of expired panes are
+ * evicted together with those panes. The solutions emitted for every window
+ * are the same as evaluating the query from scratch over that window.
+ *
+ * Windows end at multiples of the step and cover `[end - range, end)`. Quads
+ * arriving for a pane that has already completed are dropped as late.
+ * Supported FILTERs are comparisons between a variable and a constant, and
+ * the constant `FILTER(false)` of a fully covered nectar query.
+ */
+export class PaneEvaluator {
+    private options: PaneEvaluatorOptions;
+    private patterns: string[][];
+    private patternVariables: string[][];
+    private filters: FilterConstraint[];
+    private projection?: string[];
+    private distinct: boolean;
+    private paneSize: number;
+    private panes: Map<number, Pane>;
+    private solutions: CachedSolution[];
+    private nextPane: number;
+    private nextWindowEnd?: number;
+    private lateQuads: number;
+    private joinRows: number;
+    private indexes: Map<string, JoinIndex>[];
+    private indexedRows: number;
+
+    constructor(query: string, options?: Partial<PaneEvaluatorOptions>) {
+        const streamInfo = extractStreamInfo(query);
+
+        this.options = {
+          windowRange: streamInfo.windowRange,
+          windowStep: streamInfo.windowStep,
+          ...options
+        };
+
+        const { windowRange, windowStep } = this.options;
+        if (windowRange <= 0 || windowStep <= 0 || !Number.isInteger(windowRange) || !Number.isInteger(windowStep)) {
+            throw new Error('RANGE and STEP must be positive integers');
+        }
+
+        const prefixes = extractPrefixes(query);
+        const patterns = isRSPQLQuery(query)
+          ? extractRSPQLBasicGraphPatterns(query)
+          : extractBasicGraphPatterns(query);
+
+        this.patterns = patterns.map(pattern => {
+            const terms = tokenizeTerms(pattern);
+            if (terms.length !== 3) {
+                throw new Error(`Unsupported triple pattern for pane evaluation: ${pattern}`);
+            }
+            return terms.map(term => expandTerm(term, prefixes));
+        });
+        this.patternVariables = this.patterns.map(pattern => [...new Set(pattern
+            .filter(term => term.startsWith('?'))
+            .map(term => term.substring(1)))]);
+
+        this.filters = extractFilterConstraints(query).map(filter => {
+            if (!filter.comparison && filter.expression !== 'true' && filter.expression !== 'false') {
+                throw new Error(`Unsupported FILTER expression for pane evaluation: ${filter.expression}`);
+            }
+            const value = filter.comparison?.value;
+            return filter.comparison && typeof value === 'string'
+              ? { ...filter, comparison: { ...filter.comparison, value: expandTerm(value, prefixes) } }
+              : filter;
+        });
+
+        const selectMatch = query.match(/SELECT\s+(DISTINCT\s+)?(.*?)\s+(?:FROM|WHERE)\b/i);
+        this.distinct = !!selectMatch?.[1];
+        if (selectMatch && selectMatch[2].trim() !== '*') {
+            this.projection = (selectMatch[2].match(/\?\w+/g) || []).map(variable => variable.substring(1));
+        }
+
+        this.paneSize = gcd(windowRange, windowStep);
+        this.panes = new Map();
+        this.solutions = [];
+        this.nextPane = 0;
+        this.lateQuads = 0;
+        this.joinRows = 0;
+        this.indexes = this.patterns.map(() => new Map());
+        this.indexedRows = 0;
+    }
+
+    public add(quad: StreamQuad): void {
+        const index = Math.floor(quad.timestamp / this.paneSize);
+
+        if (this.nextWindowEnd === undefined) {
+            const step = this.options.windowStep;
+            this.nextWindowEnd = (Math.floor(quad.timestamp / step) + 1) * step;
+            this.nextPane = Math.floor((this.nextWindowEnd - this.options.windowRange) / this.paneSize);
+        }
+
+        if (index < this.nextPane) {
+            this.lateQuads++;
+            return;
+        }
+
+        let pane = this.panes.get(index);
+        if (!pane) {
+            pane = { quads: [], matches: [] };
+            this.panes.set(index, pane);
+        }
+
+        pane.quads.push({
+            subject: expandTerm(quad.subject, {}),
+            predicate: expandTerm(quad.predicate, {}),
+            object: expandTerm(quad.object, {}),
+            timestamp: quad.timestamp
+        });
+    }
+
+    /**
+     * Closes every window ending at or before `time` and returns their
+     * results in order.
+     */
+    public advanceTo(time: number): WindowResult[] {
+        const results: WindowResult[] = [];
+        if (this.nextWindowEnd === undefined) {
+            return results;
+        }
+
+        const { windowRange, windowStep } = this.options;
+        while (this.nextWindowEnd <= time) {
+            const windowEnd = this.nextWindowEnd;
+            const endPane = windowEnd / this.paneSize;
+            const startPane = (windowEnd - windowRange) / this.paneSize;
+
+            const completed = [...this.panes.keys()]
+                .filter(index => index >= this.nextPane && index < endPane)
+                .sort((a, b) => a - b);
+            for (const index of completed) {
+                this.completePane(index);
+            }
+            this.nextPane = endPane;
+
+            results.push({
+                windowStart: windowEnd - windowRange,
+                windowEnd,
+                bindings: this.output(this.solutions
+                    .filter(solution => solution.minPane >= startPane)
+                    .map(solution => solution.binding))
+            });
+
+            this.evict((windowEnd + windowStep - windowRange) / this.paneSize);
+            this.nextWindowEnd = windowEnd + windowStep;
+        }
+
+        return results;
+    }
+
+    /**
+     * Reference evaluation of one window from scratch over `quads`, without
+     * panes or caching.
+     */
+    public evaluateWindow(quads: StreamQuad[], windowEnd: number): SolutionBinding[] {
+        const windowStart = windowEnd - this.options.windowRange;
+        const inWindow = quads
+            .filter(quad => quad.timestamp >= windowStart && quad.timestamp < windowEnd)
+            .map(quad => ({
+                subject: expandTerm(quad.subject, {}),
+                predicate: expandTerm(quad.predicate, {}),
+                object: expandTerm(quad.object, {}),
+                timestamp: quad.timestamp
+            }));
+
+        let joined: PaneMatch[] = [{ pane: 0, binding: {} }];
+        for (const pattern of this.patterns) {
+            joined = this.join(joined, this.match(pattern, inWindow, 0));
+        }
+
+        return this.output(joined.filter(row => this.passesFilters(row.binding)).map(row => row.binding));
+    }
+
+    public getLateQuadCount(): number {
+        return this.lateQuads;
+    }
+
+    /**
+     * Rows produced by all joins so far, intermediate ones included; a
+     * measure of the work done by `advanceTo` and `evaluateWindow`.
+     */
+    public getJoinRowCount(): number {
+        return this.joinRows;
+    }
+
+    /**
+     * Pattern matches inserted into the join indexes so far; with RANGE much
+     * larger than STEP this should grow with the new panes, not the window.
+     */
+    public getIndexedRowCount(): number {
+        return this.indexedRows;
+    }
+
+    public getPaneSize(): number {
+        return this.paneSize;
+    }
+
+    public getOptions(): PaneEvaluatorOptions {
+        return { ...this.options };
+    }
+
+    private completePane(index: number): void {
+        const pane = this.panes.get(index)!;
+        pane.matches = this.patterns.map(pattern => this.match(pattern, pane.quads, index));
+        pane.quads = [];
+        this.indexes.forEach((indexes, j) => {
+            indexes.forEach(joinIndex => this.insertMatches(joinIndex, index, pane.matches[j]));
+        });
+
+        // Semi-naive delta join: seeded with the new pane's matches of pattern
+        // i, joined with earlier patterns from older panes only and later
+        // patterns from all live panes, so every combination involving the new
+        // pane is produced exactly once and none without it is rebuilt.
+        for (let i = 0; i < this.patterns.length; i++) {
+            let joined = pane.matches[i];
+            for (let j = 0; j < this.patterns.length && joined.length > 0; j++) {
+                if (j !== i) {
+                    joined = this.joinLive(joined, j, j < i ? index : undefined);
+                }
+            }
+
+            for (const row of joined) {
+                if (this.passesFilters(row.binding)) {
+                    this.solutions.push({ minPane: row.pane, binding: row.binding });
+                }
+            }
+        }
+    }
+
+    private evict(firstLivePane: number): void {
+        for (const [index, pane] of this.panes) {
+            if (index < firstLivePane) {
+                this.indexes.forEach((indexes, j) => {
+                    indexes.forEach(joinIndex => this.removeMatches(joinIndex, index, pane.matches[j] || []));
+                });
+                this.panes.delete(index);
+            }
+        }
+        this.solutions = this.solutions.filter(solution => solution.minPane >= firstLivePane);
+    }
+
+    private match(pattern: string[], quads: StreamQuad[], pane: number): PaneMatch[] {
+        const matches: PaneMatch[] = [];
+
+        for (const quad of quads) {
+            const binding: SolutionBinding = {};
+            const terms = [quad.subject, quad.predicate, quad.object];
+            let matched = true;
+
+            for (let i = 0; i < 3 && matched; i++) {
+                const term = pattern[i];
+                if (term.startsWith('?')) {
+                    const variable = term.substring(1);
+                    if (binding[variable] === undefined) {
+                        binding[variable] = terms[i];
+                    } else {
+                        matched = binding[variable] === terms[i];
+                    }
+                } else {
+                    matched = term === terms[i];
+                }
+            }
+
+            if (matched) {
+                matches.push({ pane, binding });
+            }
+        }
+
+        return matches;
+    }
+
+    /**
+     * Hash join of `left` with `right` on their shared variables.
+     */
+    private join(left: PaneMatch[], right: PaneMatch[]): PaneMatch[] {
+        if (left.length === 0 || right.length === 0) {
+            return [];
+        }
+
+        const leftVars = Object.keys(left[0].binding);
+        const shared = Object.keys(right[0].binding).filter(variable => leftVars.includes(variable));
+        const index = new Map<string, PaneMatch[]>();
+        for (const row of right) {
+            const key = this.joinKey(row.binding, shared);
+            const bucket = index.get(key);
+            if (bucket) {
+                bucket.push(row);
+            } else {
+                index.set(key, [row]);
+            }
+        }
+
+        const joined: PaneMatch[] = [];
+        for (const row of left) {
+            for (const other of index.get(this.joinKey(row.binding, shared)) || []) {
+                joined.push({
+                    pane: Math.min(row.pane, other.pane),
+                    binding: { ...row.binding, ...other.binding }
+                });
+            }
+        }
+        this.joinRows += joined.length;
+        return joined;
+    }
+
+    /**
+     * Hash join of `left` with the live panes' matches of pattern `j`,
+     * leaving out those of pane `skip`, through the persistent index of
+     * pattern `j` on the shared variables.
+     */
+    private joinLive(left: PaneMatch[], j: number, skip?: number): PaneMatch[] {
+        const leftVars = Object.keys(left[0].binding);
+        const shared = this.patternVariables[j].filter(variable => leftVars.includes(variable));
+        const signature = shared.join(' ');
+
+        let joinIndex = this.indexes[j].get(signature);
+        if (!joinIndex) {
+            joinIndex = { variables: shared, buckets: new Map() };
+            for (const [index, pane] of this.panes) {
+                this.insertMatches(joinIndex, index, pane.matches[j] || []);
+            }
+            this.indexes[j].set(signature, joinIndex);
+        }
+
+        const joined: PaneMatch[] = [];
+        for (const row of left) {
+            const buckets = joinIndex.buckets.get(this.joinKey(row.binding, shared));
+            if (!buckets) {
+                continue;
+            }
+            for (const [pane, others] of buckets) {
+                if (pane === skip) {
+                    continue;
+                }
+                for (const other of others) {
+                    joined.push({
+                        pane: Math.min(row.pane, other.pane),
+                        binding: { ...row.binding, ...other.binding }
+                    });
+                }
+            }
+        }
+        this.joinRows += joined.length;
+        return joined;
+    }
+
+    private insertMatches(joinIndex: JoinIndex, pane: number, matches: PaneMatch[]): void {
+        for (const row of matches) {
+            const key = this.joinKey(row.binding, joinIndex.variables);
+            const buckets = joinIndex.buckets.get(key) || new Map<number, PaneMatch[]>();
+            const bucket = buckets.get(pane);
+            if (bucket) {
+                bucket.push(row);
+            } else {
+                buckets.set(pane, [row]);
+            }
+            joinIndex.buckets.set(key, buckets);
+        }
+        this.indexedRows += matches.length;
+    }
+
+    private removeMatches(joinIndex: JoinIndex, pane: number, matches: PaneMatch[]): void {
+        for (const row of matches) {
+            const key = this.joinKey(row.binding, joinIndex.variables);
+            const buckets = joinIndex.buckets.get(key);
+            if (buckets) {
+                buckets.delete(pane);
+                if (buckets.size === 0) {
+                    joinIndex.buckets.delete(key);
+                }
+            }
+        }
+    }
+
+    private joinKey(binding: SolutionBinding, variables: string[]): string {
+        return variables.map(variable => binding[variable]).join('\u0000');
+    }
+
+    private passesFilters(binding: SolutionBinding): boolean {
+        return this.filters.every(filter => {
+            const comparison = filter.comparison;
+            if (!comparison) {
+                return filter.expression === 'true';
+            }
+            const term = binding[comparison.variable];
+            if (term === undefined) {
+                return false;
+            }
+            return compareValues(this.termValue(term, comparison.value), comparison.operator, comparison.value);
+        });
+    }
+
+    private termValue(term: string, compareTo: number | string): number | string {
+        if (typeof compareTo !== 'number') {
+            return term;
+        }
+        const numeric = term.match(/^"([^"]*)"\^\^/);
+        return numeric ? parseFloat(numeric[1]) : NaN;
+    }
+
+    private output(bindings: SolutionBinding[]): SolutionBinding[] {
+        let projected = bindings;
+        if (this.projection) {
+            const variables = this.projection;
+            projected = bindings.map(binding => {
+                const row: SolutionBinding = {};
+                for (const variable of variables) {
+                    if (binding[variable] !== undefined) {
+                        row[variable] = binding[variable];
+                    }
+                }
+                return row;
+            });
+        }
+
+        if (!this.distinct) {
+            return projected;
+        }
+
+        const seen = new Set<string>();
+        return projected.filter(binding => {
+            const key = JSON.stringify(Object.entries(binding).sort());
+            if (seen.has(key)) {
+                return false;
+            }
+            seen.add(key);
+            return true;
+        });
+    }
+}
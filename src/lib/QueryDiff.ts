@@ -11,7 +11,16 @@ import {
   normalizeRSPQLQuery,
   extractVariables
 } from '../utils/queryUtils';
-import { QueryDiffOptions } from '../types';
+import {
+  addFilters,
+  areFiltersImplied,
+  extractFilterConstraints,
+  isFilterImplied
+} from '../utils/filterUtils';
+import { FilterConstraint, QueryDiffOptions } from '../types';
+import { compactPattern } from '../utils/termUtils';
+import { TermDictionary } from './TermDictionary';
+import { PaneEvaluator } from './PaneEvaluator';
 
 export class QueryDiff {
     private subqueries: string[];
@@ -19,6 +28,9 @@ export class QueryDiff {
     private nectarQuery: string;
     private options: QueryDiffOptions;
     private isRSPQL: boolean;
+    private terms: TermDictionary;
+    private subqueryPatternKeys?: Map<string, Array<number | string>>;
+    private superPatternKeys?: { patterns: string[]; keys: Array<number | string> };
 
     constructor(subqueries: string[], superQuery: string, options?: Partial<QueryDiffOptions>) {
         const detectedLanguage = isRSPQLQuery(superQuery) ? 'RSPQL' : 'SPARQL';
@@ -42,6 +54,7 @@ export class QueryDiff {
         }
 
         this.nectarQuery = "";
+        this.terms = new TermDictionary();
     }
 
     public generateNectarQuery(): string {
@@ -77,7 +90,10 @@ export class QueryDiff {
         
         // Build WHERE clause with common patterns + unique patterns
         const allPatterns = [...analysis.commonPatterns, ...analysis.uniqueToSuper];
-        const whereClause = allPatterns.join(' . ');
+
+        // Push down the super query filters bound by those patterns
+        const filters = this.filtersBoundBy(allPatterns).map(filter => `FILTER(${filter})`);
+        const whereClause = [...allPatterns, ...filters].join(' . ');
         const whereBlock = `WHERE { ${whereClause} }`;
         
         // Build prefix section
@@ -95,17 +111,29 @@ export class QueryDiff {
         return this.nectarQuery;
     }
 
-    private extractSubqueryPatterns(): string[] {
-        const allPatterns: string[] = [];
-
-        for (const subquery of this.subqueries) {
-            const patterns = this.isRSPQL
-              ? extractRSPQLBasicGraphPatterns(subquery)
-              : extractBasicGraphPatterns(subquery);
-            allPatterns.push(...patterns);
+    /**
+     * Distinct covering subquery patterns, deduplicated on their dictionary
+     * keys and written back in the vocabulary of `prefixes`: IRIs whose
+     * namespace is not declared there are emitted in full, so the patterns
+     * never depend on a subquery's own prefixes.
+     */
+    private extractSubqueryPatterns(prefixes: Record<string, string>): string[] {
+        const seen = new Set<number | string>();
+        const patterns: string[] = [];
+
+        for (const [pattern, keys] of this.getSubqueryPatternKeys()) {
+            for (const key of keys) {
+                if (seen.has(key)) {
+                    continue;
+                }
+                seen.add(key);
+                patterns.push(typeof key === 'number'
+                  ? compactPattern(Array.from(TermDictionary.unpackKey(key), id => this.terms.lookup(id)!), prefixes)
+                  : pattern);
+            }
         }
 
-        return [...new Set(allPatterns)].filter(pattern => pattern.trim().length > 0);
+        return patterns;
     }
 
     public generateAdvancedNectarQuery(): string {
@@ -118,7 +146,7 @@ export class QueryDiff {
 
         const superQueryBody = removePrefixes(this.superQuery);
 
-        const minusPatterns = this.extractSubqueryPatterns();
+        const minusPatterns = this.extractSubqueryPatterns(superQueryPrefixes);
 
         if (minusPatterns.length === 0) {
             this.nectarQuery = this.options.preservePrefixes ? this.superQuery : superQueryBody;
@@ -150,35 +178,39 @@ export class QueryDiff {
         commonPatterns: string[];
         uniqueToSuper: string[];
         uniqueToSub: string[];
+        superFilters: string[];
+        nonCoveringSubqueries: string[];
         streamAnalysis?: {
           superStreamInfo: any;
           subqueriesStreamInfo: any[];
           rangeStepCompatibility: boolean;
         };
     } {
-        const superPatterns = this.isRSPQL
-          ? extractRSPQLBasicGraphPatterns(this.superQuery)
-          : extractBasicGraphPatterns(this.superQuery);
-        const subPatterns = this.extractSubqueryPatterns();
+        const { patterns: superPatterns, keys: superKeys } = this.getSuperPatternKeys();
+        const superKeySet = new Set(superKeys);
 
-        const commonPatterns = superPatterns.filter(pattern =>
-            subPatterns.some(subPattern => this.patternsMatch(pattern, subPattern))
-        );
+        const subPatternKeys = this.getSubqueryPatternKeys();
+        const subPatterns = [...subPatternKeys.keys()];
+        const subKeySet = new Set([...subPatternKeys.values()].flat());
 
-        const uniqueToSuper = superPatterns.filter(pattern =>
-            !subPatterns.some(subPattern => this.patternsMatch(pattern, subPattern))
-        );
+        const commonPatterns = superPatterns.filter((_, i) => subKeySet.has(superKeys[i]));
+
+        const uniqueToSuper = superPatterns.filter((_, i) => !subKeySet.has(superKeys[i]));
 
         const uniqueToSub = subPatterns.filter(pattern =>
-            !superPatterns.some(superPattern => this.patternsMatch(pattern, superPattern))
+            !subPatternKeys.get(pattern)!.some(key => superKeySet.has(key))
         );
 
+        const coveringSubqueries = this.coveringSubqueries();
+
         const result: any = {
             superQueryPatterns: superPatterns,
             subqueryPatterns: subPatterns,
             commonPatterns,
             uniqueToSuper,
-            uniqueToSub
+            uniqueToSub,
+            superFilters: extractFilterConstraints(this.superQuery).map(filter => filter.expression),
+            nonCoveringSubqueries: this.subqueries.filter(subquery => !coveringSubqueries.includes(subquery))
         };
 
         if (this.isRSPQL && this.options.includeWindowAnalysis) {
@@ -200,14 +232,123 @@ export class QueryDiff {
         return result;
     }
 
-    private patternsMatch(pattern1: string, pattern2: string): boolean {
+    /**
+     * Dictionary-encoded key of a triple pattern: prefixed names are expanded
+     * with the prefixes of the query the pattern came from, so patterns match
+     * on their full IRIs. Patterns that are not a single triple fall back to
+     * their normalized string.
+     */
+    private patternKey(pattern: string, prefixes: Record<string, string>): number | string {
+        const encoded = this.terms.encodePattern(pattern, prefixes);
+        if (encoded) {
+            return TermDictionary.patternKey(encoded);
+        }
+
         const normalizer = this.isRSPQL ? normalizeRSPQLQuery : normalizeQuery;
-        return normalizer(pattern1) === normalizer(pattern2);
+        return normalizer(pattern);
+    }
+
+    private getSuperPatternKeys(): { patterns: string[]; keys: Array<number | string> } {
+        if (this.superPatternKeys) {
+            return this.superPatternKeys;
+        }
+
+        const patterns = this.isRSPQL
+          ? extractRSPQLBasicGraphPatterns(this.superQuery)
+          : extractBasicGraphPatterns(this.superQuery);
+        const prefixes = extractPrefixes(this.superQuery);
+
+        this.superPatternKeys = { patterns, keys: patterns.map(pattern => this.patternKey(pattern, prefixes)) };
+        return this.superPatternKeys;
+    }
+
+    private getSubqueryPatternKeys(): Map<string, Array<number | string>> {
+        if (this.subqueryPatternKeys) {
+            return this.subqueryPatternKeys;
+        }
+
+        const keys = new Map<string, Array<number | string>>();
+        for (const subquery of this.coveringSubqueries()) {
+            const prefixes = extractPrefixes(subquery);
+            const patterns = this.isRSPQL
+              ? extractRSPQLBasicGraphPatterns(subquery)
+              : extractBasicGraphPatterns(subquery);
+
+            for (const pattern of patterns) {
+                if (pattern.trim().length === 0) {
+                    continue;
+                }
+                const key = this.patternKey(pattern, prefixes);
+                const existing = keys.get(pattern);
+                if (!existing) {
+                    keys.set(pattern, [key]);
+                } else if (!existing.includes(key)) {
+                    existing.push(key);
+                }
+            }
+        }
+
+        this.subqueryPatternKeys = keys;
+        return keys;
+    }
+
+    /**
+     * Subqueries whose FILTERs are implied by the super query's FILTERs. A
+     * subquery with a stricter filter only returns part of the solutions of
+     * its patterns, so it cannot be used to cover them.
+     */
+    private coveringSubqueries(): string[] {
+        const superFilters = extractFilterConstraints(this.superQuery);
+        return this.subqueries.filter(subquery =>
+            areFiltersImplied(extractFilterConstraints(subquery), superFilters)
+        );
+    }
+
+    /**
+     * Super query FILTER conjuncts bound by `patterns` and not implied by
+     * `existing`. Variable-free conjuncts such as `false` are always bound.
+     */
+    private filtersBoundBy(patterns: string[], existing: FilterConstraint[] = []): string[] {
+        const bound = new Set(patterns.flatMap(pattern => extractVariables(pattern)));
+        return extractFilterConstraints(this.superQuery)
+            .filter(filter => filter.variables.every(v => bound.has(v)))
+            .filter(filter => !isFilterImplied(filter, existing))
+            .map(filter => filter.expression);
+    }
+
+    /**
+     * Subqueries with the super query filters pushed into them: every filter
+     * conjunct whose variables are all bound by a subquery's patterns is added
+     * to that subquery unless it already implies it. Only valid when the
+     * subquery results are used for this super query alone.
+     */
+    public getPushedDownSubqueries(): string[] {
+        return this.subqueries.map(subquery => {
+            const patterns = this.isRSPQL
+              ? extractRSPQLBasicGraphPatterns(subquery)
+              : extractBasicGraphPatterns(subquery);
+            return addFilters(subquery, this.filtersBoundBy(patterns, extractFilterConstraints(subquery)));
+        });
+    }
+
+    /**
+     * Evaluation mode for the RSP-QL path: the nectar query, evaluated
+     * incrementally per STEP-sized pane of the super query's window.
+     */
+    public createPaneEvaluator(): PaneEvaluator {
+        if (!this.isRSPQL) {
+            throw new Error('Pane evaluation is only available for RSP-QL queries');
+        }
+
+        const { windowRange, windowStep } = extractStreamInfo(this.superQuery);
+        return new PaneEvaluator(this.generateNectarQuery(), { windowRange, windowStep });
     }
 
     public setQueryLanguage(language: 'SPARQL' | 'RSPQL'): void {
         this.options.queryLanguage = language;
         this.isRSPQL = language === 'RSPQL';
+        this.subqueryPatternKeys = undefined;
+        this.superPatternKeys = undefined;
 
         if (this.isRSPQL) {
           this.subqueries = this.subqueries.map(query => normalizeRSPQLQuery(query));
@@ -247,6 +388,6 @@ export class QueryDiff {
     }
 
     public getMinusPatterns(): string[] {
-        return this.extractSubqueryPatterns();
+        return this.extractSubqueryPatterns(extractPrefixes(this.superQuery));
     }
 }
\ No newline at end of file
@@ -0,0 +1,157 @@
+import { performance, PerformanceObserver } from 'perf_hooks';
+import { GCEvent, ResourceSample, ResourceSamplerOptions, ResourceTrace } from '../types';
+
+const SAMPLE_COLUMNS = [
+    'strategy', 'run', 'time_ms', 'rss', 'heap_used', 'heap_total',
+    'external', 'array_buffers', 'cpu_user_ms', 'cpu_system_ms'
+];
+
+const GC_COLUMNS = ['strategy', 'run', 'start_ms', 'duration_ms', 'kind'];
+
+/**
+ * Records a time series of process memory (RSS, heap, external/ArrayBuffer),
+ * CPU user/system time and GC pauses while a query runs, instead of a single
+ * heap delta taken before and after. Samples are taken on a timer, so they are
+ * only collected while the measured code yields to the event loop (which the
+ * asynchronous query engines do); a sample is always taken at start and stop.
+ */
+export class ResourceSampler {
+    private options: ResourceSamplerOptions;
+    private label: string;
+    private samples: ResourceSample[];
+    private gcEvents: GCEvent[];
+    private startTime: number;
+    private startCpu: NodeJS.CpuUsage;
+    private timer?: NodeJS.Timeout;
+    private observer?: PerformanceObserver;
+
+    constructor(options?: Partial<ResourceSamplerOptions>) {
+        this.options = {
+          intervalMs: 5,
+          recordGC: true,
+          ...options
+        };
+
+        this.label = '';
+        this.samples = [];
+        this.gcEvents = [];
+        this.startTime = 0;
+        this.startCpu = process.cpuUsage();
+    }
+
+    public start(label: string = ''): void {
+        if (this.isRunning()) {
+            throw new Error('ResourceSampler is already running');
+        }
+
+        this.label = label;
+        this.samples = [];
+        this.gcEvents = [];
+        this.startTime = performance.now();
+        this.startCpu = process.cpuUsage();
+
+        if (this.options.recordGC) {
+            this.observer = new PerformanceObserver(list => {
+                for (const entry of list.getEntries()) {
+                    const detail = (entry as any).detail;
+                    this.gcEvents.push({
+                        startMs: entry.startTime - this.startTime,
+                        durationMs: entry.duration,
+                        kind: detail?.kind ?? (entry as any).kind ?? 0
+                    });
+                }
+            });
+            this.observer.observe({ entryTypes: ['gc'] });
+        }
+
+        this.sample();
+        this.timer = setInterval(() => this.sample(), this.options.intervalMs);
+        this.timer.unref();
+    }
+
+    public stop(): ResourceTrace {
+        if (!this.isRunning()) {
+            throw new Error('ResourceSampler is not running');
+        }
+
+        this.sample();
+        clearInterval(this.timer);
+        this.timer = undefined;
+
+        if (this.observer) {
+            const pending = (this.observer as any).takeRecords?.() ?? [];
+            for (const entry of pending) {
+                this.gcEvents.push({
+                    startMs: entry.startTime - this.startTime,
+                    durationMs: entry.duration,
+                    kind: entry.detail?.kind ?? entry.kind ?? 0
+                });
+            }
+            this.observer.disconnect();
+            this.observer = undefined;
+        }
+
+        return {
+            label: this.label,
+            durationMs: performance.now() - this.startTime,
+            samples: this.samples,
+            gcEvents: this.gcEvents
+        };
+    }
+
+    public async measure<T>(label: string, fn: () => Promise<T> | T): Promise<{ result: T; trace: ResourceTrace }> {
+        this.start(label);
+        try {
+            const result = await fn();
+            return { result, trace: this.stop() };
+        } catch (error) {
+            this.stop();
+            throw error;
+        }
+    }
+
+    public isRunning(): boolean {
+        return this.timer !== undefined;
+    }
+
+    public getOptions(): ResourceSamplerOptions {
+        return { ...this.options };
+    }
+
+    private sample(): void {
+        const memory = process.memoryUsage();
+        const cpu = process.cpuUsage(this.startCpu);
+
+        this.samples.push({
+            timeMs: performance.now() - this.startTime,
+            rss: memory.rss,
+            heapUsed: memory.heapUsed,
+            heapTotal: memory.heapTotal,
+            external: memory.external,
+            arrayBuffers: memory.arrayBuffers,
+            cpuUserMs: cpu.user / 1000,
+            cpuSystemMs: cpu.system / 1000
+        });
+    }
+
+    /**
+     * Serializes traces as the samples CSV read by
+     * scripts/analysis/resource_timeseries_analysis.py. Memory is in bytes.
+     */
+    public static samplesToCSV(traces: ResourceTrace[]): string {
+        const rows = traces.flatMap((trace, run) =>
+            trace.samples.map(s => [
+                trace.label, run, s.timeMs, s.rss, s.heapUsed, s.heapTotal,
+                s.external, s.arrayBuffers, s.cpuUserMs, s.cpuSystemMs
+            ].join(','))
+        );
+        return [SAMPLE_COLUMNS.join(','), ...rows].join('\n') + '\n';
+    }
+
+    public static gcEventsToCSV(traces: ResourceTrace[]): string {
+        const rows = traces.flatMap((trace, run) =>
+            trace.gcEvents.map(e => [trace.label, run, e.startMs, e.durationMs, e.kind].join(','))
+        );
+        return [GC_COLUMNS.join(','), ...rows].join('\n') + '\n';
+    }
+}
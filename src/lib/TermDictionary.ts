@@ -0,0 +1,85 @@
+import { expandTerm, tokenizeTerms } from '../utils/termUtils';
+
+const TERM_BITS = 17;
+const TERM_SPACE = 2 ** TERM_BITS;
+
+/**
+ * Interns IRIs, literals and variables into integer ids so triple patterns can
+ * be compared and hashed as numbers. Prefixed names are expanded to full IRIs
+ * before interning, so `:hasTemp` and `ex:hasTemp` bound to the same namespace
+ * get the same id.
+ *
+ * Three ids are packed into one safe integer (see `patternKey`), which limits a
+ * dictionary to 2^17 distinct terms.
+ */
+export class TermDictionary {
+    private ids: Map<string, number>;
+    private terms: string[];
+
+    constructor() {
+        this.ids = new Map();
+        this.terms = [];
+    }
+
+    public intern(term: string): number {
+        const existing = this.ids.get(term);
+        if (existing !== undefined) {
+            return existing;
+        }
+
+        if (this.terms.length >= TERM_SPACE) {
+            throw new RangeError(`TermDictionary is limited to ${TERM_SPACE} terms`);
+        }
+
+        const id = this.terms.length;
+        this.ids.set(term, id);
+        this.terms.push(term);
+        return id;
+    }
+
+    public lookup(id: number): string | undefined {
+        return this.terms[id];
+    }
+
+    public getId(term: string): number | undefined {
+        return this.ids.get(term);
+    }
+
+    public size(): number {
+        return this.terms.length;
+    }
+
+    /**
+     * Encodes a triple pattern as [subject, predicate, object] ids, or returns
+     * null when the pattern is not a single triple (e.g. a predicate-object
+     * continuation after `;`).
+     */
+    public encodePattern(pattern: string, prefixes: Record<string, string>): Uint32Array | null {
+        const tokens = tokenizeTerms(pattern);
+        if (tokens.length !== 3) {
+            return null;
+        }
+
+        const encoded = new Uint32Array(3);
+        for (let i = 0; i < 3; i++) {
+            encoded[i] = this.intern(expandTerm(tokens[i], prefixes));
+        }
+        return encoded;
+    }
+
+    public decodePattern(encoded: Uint32Array): string {
+        return Array.from(encoded, id => this.terms[id]).join(' ');
+    }
+
+    public static patternKey(encoded: Uint32Array): number {
+        return (encoded[0] * TERM_SPACE + encoded[1]) * TERM_SPACE + encoded[2];
+    }
+
+    public static unpackKey(key: number): Uint32Array {
+        const encoded = new Uint32Array(3);
+        encoded[2] = key % TERM_SPACE;
+        encoded[1] = Math.floor(key / TERM_SPACE) % TERM_SPACE;
+        encoded[0] = Math.floor(key / (TERM_SPACE * TERM_SPACE));
+        return encoded;
+    }
+}
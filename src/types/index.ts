@@ -40,3 +40,96 @@ export interface NectarResult {
 export interface BatchNectarResult extends NectarResult {
   commonPatterns: string[];
 }
+
+export interface ResourceSample {
+  timeMs: number;
+  rss: number;
+  heapUsed: number;
+  heapTotal: number;
+  external: number;
+  arrayBuffers: number;
+  cpuUserMs: number;
+  cpuSystemMs: number;
+}
+
+export interface GCEvent {
+  startMs: number;
+  durationMs: number;
+  kind: number;
+}
+
+export interface ResourceTrace {
+  label: string;
+  durationMs: number;
+  samples: ResourceSample[];
+  gcEvents: GCEvent[];
+}
+
+export interface ResourceSamplerOptions {
+  intervalMs: number;
+  recordGC: boolean;
+}
+
+export interface MultiQueryPlannerOptions {
+  minSharedPatterns: number;
+  minSharingQueries: number;
+  maxSharedGroups: number;
+}
+
+export interface SharedSubPlan {
+  id: string;
+  patterns: string[];
+  ownPatterns: string[];
+  dependsOn: string[];
+  usedBy: number[];
+  query: string;
+}
+
+export interface SuperQueryPlan {
+  superQueryIndex: number;
+  sharedInputs: string[];
+  coveredPatterns: string[];
+  residualPatterns: string[];
+  nectarQuery: string;
+  joinFilters: string[];
+}
+
+export interface MultiQueryPlan {
+  sharedPlans: SharedSubPlan[];
+  queryPlans: SuperQueryPlan[];
+  patternEvaluations: number;
+  patternEvaluationsWithoutSharing: number;
+  joinOperations: number;
+}
+
+export type FilterOperator = '<' | '<=' | '>' | '>=' | '=' | '!=';
+
+export interface FilterConstraint {
+  expression: string;
+  variables: string[];
+  comparison?: {
+    variable: string;
+    operator: FilterOperator;
+    value: number | string;
+  };
+}
+
+export interface StreamQuad {
+  subject: string;
+  predicate: string;
+  object: string;
+  timestamp: number;
+}
+
+export type SolutionBinding = Record<string, string>;
+
+export interface WindowResult {
+  windowStart: number;
+  windowEnd: number;
+  bindings: SolutionBinding[];
+}
+
+export interface PaneEvaluatorOptions {
+  windowRange: number;
+  windowStep: number;
+}
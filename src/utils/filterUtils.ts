@@ -0,0 +1,343 @@
+import { FilterConstraint, FilterOperator } from '../types';
+import { tokenizeTerms } from './termUtils';
+
+const COMPARISON_OPERATORS: FilterOperator[] = ['<=', '>=', '!=', '<', '>', '='];
+
+const FLIPPED_OPERATORS: Record<FilterOperator, FilterOperator> = {
+  '<': '>',
+  '<=': '>=',
+  '>': '<',
+  '>=': '<=',
+  '=': '=',
+  '!=': '!='
+};
+
+const NUMERIC_REGEX = /^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$/;
+const IRI_REGEX = /^<[^\s<>"{}|^`\\]*:[^\s<>"{}|^`\\]*>/;
+const TYPED_NUMERIC_REGEX = /^["']([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)["']\^\^\S+$/;
+
+function findClosingParen(text: string, open: number): number {
+  let depth = 0;
+  let quote = '';
+
+  for (let i = open; i < text.length; i++) {
+    const char = text[i];
+    if (quote) {
+      if (char === '\\') {
+        i++;
+      } else if (char === quote) {
+        quote = '';
+      }
+    } else if (char === '"' || char === '\'') {
+      quote = char;
+    } else if (char === '(') {
+      depth++;
+    } else if (char === ')') {
+      depth--;
+      if (depth === 0) {
+        return i;
+      }
+    }
+  }
+
+  return -1;
+}
+
+function findFilterClauses(text: string): Array<{ start: number; end: number; expression: string }> {
+  const clauses: Array<{ start: number; end: number; expression: string }> = [];
+  const filterRegex = /FILTER\s*(\w*)\s*\(/gi;
+  let match;
+
+  while ((match = filterRegex.exec(text)) !== null) {
+    const open = match.index + match[0].length - 1;
+    const close = findClosingParen(text, open);
+    if (close < 0) {
+      break;
+    }
+
+    const inner = text.substring(open + 1, close);
+    const expression = match[1] ? `${match[1]}(${inner})` : inner;
+    clauses.push({ start: match.index, end: close + 1, expression: expression.replace(/\s+/g, ' ').trim() });
+    filterRegex.lastIndex = close + 1;
+  }
+
+  return clauses;
+}
+
+export function extractFilters(query: string): string[] {
+  const whereIndex = query.search(/WHERE\s*\{/i);
+  if (whereIndex < 0) {
+    return [];
+  }
+
+  return findFilterClauses(query.substring(whereIndex)).map(clause => clause.expression);
+}
+
+export function removeFilters(clause: string, replacement = ''): string {
+  let result = '';
+  let last = 0;
+
+  for (const filter of findFilterClauses(clause)) {
+    result += clause.substring(last, filter.start) + replacement;
+    last = filter.end;
+  }
+
+  return result + clause.substring(last);
+}
+
+function splitConjuncts(expression: string): string[] {
+  const conjuncts: string[] = [];
+  let depth = 0;
+  let quote = '';
+  let start = 0;
+
+  for (let i = 0; i < expression.length; i++) {
+    const char = expression[i];
+    if (quote) {
+      if (char === '\\') {
+        i++;
+      } else if (char === quote) {
+        quote = '';
+      }
+    } else if (char === '"' || char === '\'') {
+      quote = char;
+    } else if (char === '(') {
+      depth++;
+    } else if (char === ')') {
+      depth--;
+    } else if (depth === 0 && expression.startsWith('&&', i)) {
+      conjuncts.push(expression.substring(start, i));
+      start = i + 2;
+      i++;
+    }
+  }
+
+  conjuncts.push(expression.substring(start));
+  return conjuncts.map(conjunct => stripOuterParens(conjunct.trim())).filter(conjunct => conjunct.length > 0);
+}
+
+function stripOuterParens(expression: string): string {
+  let current = expression;
+  while (current.startsWith('(') && findClosingParen(current, 0) === current.length - 1) {
+    current = current.substring(1, current.length - 1).trim();
+  }
+  return current;
+}
+
+function parseValue(term: string): number | string {
+  if (NUMERIC_REGEX.test(term)) {
+    return parseFloat(term);
+  }
+
+  const typed = term.match(TYPED_NUMERIC_REGEX);
+  if (typed) {
+    return parseFloat(typed[1]);
+  }
+
+  return term;
+}
+
+/**
+ * First comparison operator outside IRIs and quoted literals, so the `<` of
+ * `?s = <https://rsp.js/s1>` is not mistaken for a less-than.
+ */
+function findComparisonOperator(expression: string): { index: number; operator: FilterOperator } | undefined {
+  let quote = '';
+
+  for (let i = 0; i < expression.length; i++) {
+    const char = expression[i];
+    if (quote) {
+      if (char === '\\') {
+        i++;
+      } else if (char === quote) {
+        quote = '';
+      }
+      continue;
+    }
+    if (char === '"' || char === '\'') {
+      quote = char;
+      continue;
+    }
+    if (char === '<') {
+      const iri = expression.substring(i).match(IRI_REGEX);
+      if (iri) {
+        i += iri[0].length - 1;
+        continue;
+      }
+    }
+
+    const operator = COMPARISON_OPERATORS.find(candidate => expression.startsWith(candidate, i));
+    if (operator) {
+      return { index: i, operator };
+    }
+  }
+
+  return undefined;
+}
+
+function parseComparison(expression: string): FilterConstraint['comparison'] {
+  const found = findComparisonOperator(expression);
+  if (!found) {
+    return undefined;
+  }
+
+  const { index, operator } = found;
+  const left = expression.substring(0, index).trim();
+  const right = expression.substring(index + operator.length).trim();
+  const isConstant = (term: string): boolean => !term.includes('?') && tokenizeTerms(term).length === 1;
+
+  if (/^\?\w+$/.test(left) && isConstant(right)) {
+    return { variable: left.substring(1), operator, value: parseValue(right) };
+  }
+  if (/^\?\w+$/.test(right) && isConstant(left)) {
+    return { variable: right.substring(1), operator: FLIPPED_OPERATORS[operator], value: parseValue(left) };
+  }
+  return undefined;
+}
+
+export function parseFilterConstraints(expression: string): FilterConstraint[] {
+  return splitConjuncts(expression).map(conjunct => {
+    const variables: string[] = [];
+    const variableRegex = /\?(\w+)/g;
+    let match;
+    while ((match = variableRegex.exec(conjunct)) !== null) {
+      if (!variables.includes(match[1])) {
+        variables.push(match[1]);
+      }
+    }
+
+    return {
+      expression: conjunct,
+      variables,
+      comparison: parseComparison(conjunct)
+    };
+  });
+}
+
+export function extractFilterConstraints(query: string): FilterConstraint[] {
+  return extractFilters(query).flatMap(expression => parseFilterConstraints(expression));
+}
+
+/**
+ * Whether `constraint` holds for every solution that satisfies `given`, i.e.
+ * applying it after `given` removes nothing. Numeric comparisons on the same
+ * variable are checked by range implication; any other constraint is only
+ * implied by an identical one.
+ */
+export function isFilterImplied(constraint: FilterConstraint, given: FilterConstraint[]): boolean {
+  if (given.some(other => other.expression === constraint.expression)) {
+    return true;
+  }
+
+  const target = constraint.comparison;
+  if (!target) {
+    return false;
+  }
+
+  let lower = -Infinity;
+  let lowerInclusive = false;
+  let upper = Infinity;
+  let upperInclusive = false;
+  let equal: number | string | undefined;
+  const notEqual: Array<number | string> = [];
+
+  for (const other of given) {
+    const comparison = other.comparison;
+    if (!comparison || comparison.variable !== target.variable) {
+      continue;
+    }
+
+    const value = comparison.value;
+    if (comparison.operator === '=') {
+      equal = value;
+    } else if (comparison.operator === '!=') {
+      notEqual.push(value);
+    } else if (typeof value === 'number') {
+      if ((comparison.operator === '>' || comparison.operator === '>=') &&
+          (value > lower || (value === lower && comparison.operator === '>'))) {
+        lower = value;
+        lowerInclusive = comparison.operator === '>=';
+      }
+      if ((comparison.operator === '<' || comparison.operator === '<=') &&
+          (value < upper || (value === upper && comparison.operator === '<'))) {
+        upper = value;
+        upperInclusive = comparison.operator === '<=';
+      }
+    }
+  }
+
+  const value = target.value;
+  if (equal !== undefined) {
+    return compareValues(equal, target.operator, value);
+  }
+
+  if (target.operator === '!=') {
+    if (notEqual.includes(value)) {
+      return true;
+    }
+    return typeof value === 'number' &&
+      (value < lower || (value === lower && !lowerInclusive) ||
+       value > upper || (value === upper && !upperInclusive));
+  }
+
+  if (typeof value !== 'number') {
+    return false;
+  }
+
+  switch (target.operator) {
+    case '>':
+      return lower > value || (lower === value && !lowerInclusive);
+    case '>=':
+      return lower >= value;
+    case '<':
+      return upper < value || (upper === value && !upperInclusive);
+    case '<=':
+      return upper <= value;
+    default:
+      return false;
+  }
+}
+
+export function compareValues(actual: number | string, operator: FilterOperator, value: number | string): boolean {
+  if (operator === '=') {
+    return actual === value;
+  }
+  if (operator === '!=') {
+    return actual !== value;
+  }
+  if (typeof actual !== 'number' || typeof value !== 'number') {
+    return false;
+  }
+
+  switch (operator) {
+    case '<':
+      return actual < value;
+    case '<=':
+      return actual <= value;
+    case '>':
+      return actual > value;
+    default:
+      return actual >= value;
+  }
+}
+
+export function areFiltersImplied(constraints: FilterConstraint[], given: FilterConstraint[]): boolean {
+  return constraints.every(constraint => isFilterImplied(constraint, given));
+}
+
+export function addFilters(query: string, expressions: string[]): string {
+  if (expressions.length === 0) {
+    return query;
+  }
+
+  const match = query.match(/(.*WHERE\s*\{\s*WINDOW\s+[^{]*\{)([^}]*)\}(.*)/is)
+    || query.match(/(.*WHERE\s*\{)([^}]*)\}(.*)/is);
+  if (!match) {
+    return query;
+  }
+
+  const [, before, body, after] = match;
+  const filterClause = expressions.map(expression => `FILTER(${expression})`).join(' ');
+
+  return `${before} ${body.trim()} ${filterClause} }${after}`;
+}
@@ -1,3 +1,5 @@
+import { removeFilters } from './filterUtils';
+
 export function normalizeQuery(query: string): string {
   return query
     .replace(/\s+/g, ' ')
@@ -36,14 +38,66 @@ export function extractBasicGraphPatterns(query: string): string[] {
     return patterns;
   }
 
-  const whereClause = whereMatch[1].trim();
+  return splitTriplePatterns(whereMatch[1]);
+}
 
-  const triplePatterns = whereClause
-    .split(/[.;]/)
-    .map(pattern => pattern.trim())
-    .filter(pattern => pattern.length > 0 && !pattern.match(/^\s*FILTER/i));
+// IRIs, quoted literals (with language tag or datatype), the `.`, `;` and `,`
+// separators, and bare terms. A dot only continues a bare term when a name
+// character follows it, as in `20.5` or `ex:a.b`.
+const STATEMENT_TOKEN_REGEX = /<[^>]*>|"(?:[^"\\]|\\.)*"(?:@[\w-]+|\^\^(?:<[^>]*>|[\w-]*:(?:[\w-]|\.(?=[\w-]))*))?|'(?:[^'\\]|\\.)*'(?:@[\w-]+|\^\^(?:<[^>]*>|[\w-]*:(?:[\w-]|\.(?=[\w-]))*))?|[.;,]|(?:[^\s<"';,.]|\.(?=[\w-]))+/g;
+
+/**
+ * Splits a basic graph pattern into triple patterns. Separators inside IRIs
+ * and literals are ignored, FILTERs are dropped, and `;`/`,` predicate-object
+ * lists are expanded into full triples. A statement that is not a well-formed
+ * triple is kept as one pattern.
+ */
+export function splitTriplePatterns(clause: string): string[] {
+  const tokens = removeFilters(clause, ' . ').match(STATEMENT_TOKEN_REGEX) || [];
+  const patterns: string[] = [];
 
-  return triplePatterns;
+  const statements: string[][] = [[]];
+  for (const token of tokens) {
+    if (token === '.') {
+      statements.push([]);
+    } else {
+      statements[statements.length - 1].push(token);
+    }
+  }
+
+  for (const statement of statements.filter(terms => terms.length > 0)) {
+    const subject = statement[0];
+    const lists = splitOn(statement.slice(1), ';').filter(list => list.length > 0);
+    const wellFormed = lists.length > 0 && lists.every(list => {
+      const objects = splitOn(list.slice(1), ',');
+      return list.length >= 2 && objects.every(object => object.length === 1);
+    });
+
+    if (!wellFormed) {
+      patterns.push(statement.join(' '));
+      continue;
+    }
+
+    for (const list of lists) {
+      for (const [object] of splitOn(list.slice(1), ',')) {
+        patterns.push(`${subject} ${list[0]} ${object}`);
+      }
+    }
+  }
+
+  return patterns;
+}
+
+function splitOn(tokens: string[], separator: string): string[][] {
+  const parts: string[][] = [[]];
+  for (const token of tokens) {
+    if (token === separator) {
+      parts.push([]);
+    } else {
+      parts[parts.length - 1].push(token);
+    }
+  }
+  return parts;
 }
 
 export function extractVariables(query: string): string[] {
@@ -147,24 +201,12 @@ export function extractRSPQLBasicGraphPatterns(query: string): string[] {
   if (!windowMatch) {
     const whereMatch = query.match(/WHERE\s*\{([^}]*)\}/i);
     if (whereMatch) {
-      const whereClause = whereMatch[1].trim();
-      const triplePatterns = whereClause
-        .split(/[.;]/)
-        .map(pattern => pattern.trim())
-        .filter(pattern => pattern.length > 0 && !pattern.match(/^\s*FILTER/i));
-      return triplePatterns;
+      return splitTriplePatterns(whereMatch[1]);
     }
     return patterns;
   }
 
-  const windowClause = windowMatch[2].trim();
-
-  const triplePatterns = windowClause
-    .split(/[.;]/)
-    .map(pattern => pattern.trim())
-    .filter(pattern => pattern.length > 0 && !pattern.match(/^\s*FILTER/i));
-
-  return triplePatterns;
+  return splitTriplePatterns(windowMatch[2]);
 }
 
 export function buildRSPQLMinusQuery(superQuery: string, minusPatterns: string[]): string {
@@ -0,0 +1,127 @@
+const RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type';
+const XSD = 'http://www.w3.org/2001/XMLSchema#';
+
+const TERM_REGEX = /<[^>]*>|"(?:[^"\\]|\\.)*"(?:@[\w-]+|\^\^(?:<[^>]*>|[\w-]*:[\w.-]*))?|'(?:[^'\\]|\\.)*'(?:@[\w-]+|\^\^(?:<[^>]*>|[\w-]*:[\w.-]*))?|\S+/g;
+
+export function tokenizeTerms(pattern: string): string[] {
+  return pattern.match(TERM_REGEX) || [];
+}
+
+export function expandPrefixedName(name: string, prefixes: Record<string, string>): string {
+  const colon = name.indexOf(':');
+  if (colon < 0) {
+    return name;
+  }
+
+  const prefix = name.substring(0, colon);
+  if (!(prefix in prefixes)) {
+    return name;
+  }
+
+  return `<${prefixes[prefix]}${name.substring(colon + 1)}>`;
+}
+
+export function expandTerm(term: string, prefixes: Record<string, string>): string {
+  if (term.startsWith('<') || term.startsWith('_:')) {
+    return term;
+  }
+
+  if (term.startsWith('?') || term.startsWith('$')) {
+    return `?${term.substring(1)}`;
+  }
+
+  if (term.startsWith('"') || term.startsWith('\'')) {
+    return expandLiteral(term, prefixes);
+  }
+
+  if (term === 'a') {
+    return `<${RDF_TYPE}>`;
+  }
+
+  if (/^[+-]?\d+$/.test(term)) {
+    return `"${term}"^^<${XSD}integer>`;
+  }
+
+  if (/^[+-]?\d*\.\d+$/.test(term)) {
+    return `"${term}"^^<${XSD}decimal>`;
+  }
+
+  if (/^[+-]?(\d+\.?\d*|\.\d+)[eE][+-]?\d+$/.test(term)) {
+    return `"${term}"^^<${XSD}double>`;
+  }
+
+  if (term === 'true' || term === 'false') {
+    return `"${term}"^^<${XSD}boolean>`;
+  }
+
+  return expandPrefixedName(term, prefixes);
+}
+
+function expandLiteral(literal: string, prefixes: Record<string, string>): string {
+  const quote = literal[0];
+  const end = literal.lastIndexOf(quote);
+  let lexical = literal.substring(1, end);
+  const suffix = literal.substring(end + 1);
+
+  if (quote === '\'' && !lexical.includes('"')) {
+    lexical = lexical.replace(/\\'/g, '\'');
+  } else if (quote === '\'') {
+    return literal;
+  }
+
+  if (suffix.startsWith('^^')) {
+    const datatype = suffix.substring(2);
+    return `"${lexical}"^^${datatype.startsWith('<') ? datatype : expandPrefixedName(datatype, prefixes)}`;
+  }
+
+  return `"${lexical}"${suffix.toLowerCase()}`;
+}
+
+/**
+ * Inverse of `expandTerm`: writes a full IRI with one of `prefixes` when its
+ * namespace is declared there, and numeric/boolean typed literals in their
+ * short form. Terms that cannot be shortened are returned unchanged.
+ */
+export function compactTerm(term: string, prefixes: Record<string, string>): string {
+  if (term.startsWith('<')) {
+    const iri = term.substring(1, term.length - 1);
+    let compacted = term;
+    let longest = 0;
+    for (const [prefix, namespace] of Object.entries(prefixes)) {
+      const local = iri.substring(namespace.length);
+      if (namespace.length > longest && iri.startsWith(namespace) && /^[\w-]*$/.test(local)) {
+        compacted = `${prefix}:${local}`;
+        longest = namespace.length;
+      }
+    }
+    return compacted;
+  }
+
+  const typed = term.match(/^"([^"]*)"\^\^<([^>]*)>$/);
+  if (typed) {
+    const [, lexical, datatype] = typed;
+    const shortForms: Record<string, RegExp> = {
+      [`${XSD}integer`]: /^[+-]?\d+$/,
+      [`${XSD}decimal`]: /^[+-]?\d*\.\d+$/,
+      [`${XSD}double`]: /^[+-]?(\d+\.?\d*|\.\d+)[eE][+-]?\d+$/,
+      [`${XSD}boolean`]: /^(true|false)$/
+    };
+    if (shortForms[datatype]?.test(lexical)) {
+      return lexical;
+    }
+    const datatypeTerm = compactTerm(`<${datatype}>`, prefixes);
+    return `"${lexical}"^^${datatypeTerm}`;
+  }
+
+  return term;
+}
+
+/**
+ * Writes an expanded [subject, predicate, object] triple back as a pattern in
+ * the vocabulary of `prefixes`, using `a` for an rdf:type predicate.
+ */
+export function compactPattern(terms: string[], prefixes: Record<string, string>): string {
+  return terms
+    .map((term, i) => i === 1 && term === `<${RDF_TYPE}>` ? 'a' : compactTerm(term, prefixes))
+    .join(' ');
+}
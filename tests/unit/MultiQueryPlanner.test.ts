@@ -0,0 +1,212 @@
+import { MultiQueryPlanner } from '../../src/lib/MultiQueryPlanner';
+import { PaneEvaluator } from '../../src/lib/PaneEvaluator';
+import { QueryDiff } from '../../src/lib/QueryDiff';
+
+describe('MultiQueryPlanner', () => {
+  const prefix = 'PREFIX : <http://ex.org/>';
+  const superQueries = [
+    `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :hasHum ?h . ?s :location ?l }`,
+    `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :hasHum ?h . ?s :battery ?b }`,
+    `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :owner ?o }`
+  ];
+
+  it('should build a DAG of shared pattern groups', () => {
+    const plan = new MultiQueryPlanner(superQueries).plan();
+
+    expect(plan.sharedPlans).toHaveLength(2);
+    const [temp, tempHum] = plan.sharedPlans;
+
+    expect(temp.patterns).toEqual(['?s :hasTemp ?t']);
+    expect(temp.dependsOn).toEqual([]);
+    expect(temp.usedBy).toEqual([0, 1, 2]);
+
+    expect(tempHum.patterns).toHaveLength(2);
+    expect(tempHum.ownPatterns).toEqual(['?s :hasHum ?h']);
+    expect(tempHum.dependsOn).toEqual([temp.id]);
+    expect(tempHum.usedBy).toEqual([0, 1]);
+    expect(tempHum.query).toContain('SELECT ?s ?h');
+    expect(tempHum.query).not.toContain('hasTemp');
+  });
+
+  it('should count the patterns the emitted queries actually evaluate', () => {
+    const plan = new MultiQueryPlanner(superQueries).plan();
+    const evaluated = [...plan.sharedPlans.map(shared => shared.query), ...plan.queryPlans.map(q => q.nectarQuery)]
+      .filter(query => query.length > 0)
+      .reduce((total, query) => total + query.match(/WHERE \{ (.*) \}/)![1].split(' . ').length, 0);
+
+    expect(evaluated).toBe(plan.patternEvaluations);
+  });
+
+  it('should find groups common to three queries that no pair has exactly in common', () => {
+    const queries = [
+      `${prefix} SELECT * WHERE { ?s :p1 ?a . ?s :p2 ?b . ?s :p3 ?c }`,
+      `${prefix} SELECT * WHERE { ?s :p1 ?a . ?s :p2 ?b . ?s :p4 ?d }`,
+      `${prefix} SELECT * WHERE { ?s :p1 ?a . ?s :p3 ?c . ?s :p4 ?d }`
+    ];
+    const plan = new MultiQueryPlanner(queries, [], { minSharingQueries: 3 }).plan();
+
+    expect(plan.sharedPlans).toHaveLength(1);
+    expect(plan.sharedPlans[0].patterns).toEqual(['?s :p1 ?a']);
+    expect(plan.sharedPlans[0].usedBy).toEqual([0, 1, 2]);
+  });
+
+  it('should not emit shared plans that serve a single query', () => {
+    const queries = [
+      `${prefix} SELECT * WHERE { ?s :p1 ?a . ?s :p2 ?b . ?s :p3 ?c }`,
+      `${prefix} SELECT * WHERE { ?s :p1 ?a . ?s :p2 ?b }`,
+      `${prefix} SELECT * WHERE { ?s :p2 ?b . ?s :p3 ?c }`
+    ];
+    const plan = new MultiQueryPlanner(queries).plan();
+
+    expect(plan.sharedPlans.map(shared => shared.patterns.length)).toEqual([1, 2]);
+    plan.sharedPlans.forEach(shared => expect(shared.usedBy.length).toBeGreaterThanOrEqual(2));
+    expect(plan.queryPlans[2].residualPatterns).toEqual(['?s :p3 ?c']);
+  });
+
+  it('should emit per-query residuals joined with shared inputs', () => {
+    const plan = new MultiQueryPlanner(superQueries).plan();
+
+    expect(plan.queryPlans.map(q => q.residualPatterns)).toEqual([
+      ['?s :location ?l'],
+      ['?s :battery ?b'],
+      ['?s :owner ?o']
+    ]);
+    expect(plan.queryPlans[0].sharedInputs).toEqual([plan.sharedPlans[1].id]);
+    expect(plan.queryPlans[2].sharedInputs).toEqual([plan.sharedPlans[0].id]);
+    expect(plan.queryPlans[0].nectarQuery).toContain('PREFIX : <http://ex.org/>');
+    expect(plan.queryPlans[0].nectarQuery).toContain('WHERE { ?s :location ?l }');
+
+    expect(plan.patternEvaluationsWithoutSharing).toBe(8);
+    expect(plan.patternEvaluations).toBe(5);
+    // hasHum joins hasTemp, and every super query joins its shared input with its residual.
+    expect(plan.joinOperations).toBe(4);
+  });
+
+  it('should keep only the most beneficial shared groups', () => {
+    let seed = 42;
+    const random = (): number => (seed = (seed * 1103515245 + 12345) % 2147483648) / 2147483648;
+    const queries = Array.from({ length: 120 }, () => {
+      const predicates = new Set<number>();
+      while (predicates.size < 8) {
+        predicates.add(Math.floor(random() * 20));
+      }
+      return `${prefix} SELECT * WHERE { ${[...predicates].map(p => `?s :p${p} ?v${p}`).join(' . ')} }`;
+    });
+
+    const plan = new MultiQueryPlanner(queries, [], { maxSharedGroups: 16 }).plan();
+
+    expect(plan.sharedPlans.length).toBeGreaterThan(0);
+    expect(plan.sharedPlans.length).toBeLessThanOrEqual(16);
+    expect(plan.patternEvaluations).toBeLessThan(plan.patternEvaluationsWithoutSharing);
+    expect(plan.joinOperations).toBeGreaterThan(0);
+  });
+
+  it('should leave patterns covered by registered subqueries out of the plan', () => {
+    const subqueries = [`PREFIX ex: <http://ex.org/> SELECT * WHERE { ?s ex:location ?l }`];
+    const plan = new MultiQueryPlanner(superQueries, subqueries).plan();
+
+    expect(plan.queryPlans[0].coveredPatterns).toEqual(['?s :location ?l']);
+    expect(plan.queryPlans[0].residualPatterns).toEqual([]);
+    expect(plan.queryPlans[0].nectarQuery).toBe('');
+  });
+
+  it('should not share patterns between RSP-QL queries on different windows', () => {
+    const rspql = (range: number) => `PREFIX : <https://rsp.js/>
+      REGISTER RStream <output> AS
+      SELECT ?s ?temp
+      FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE ${range} STEP 2]
+      WHERE{
+          WINDOW :w1 { ?s :hasTemp ?temp }
+      }`;
+
+    const plan = new MultiQueryPlanner([rspql(10), rspql(20)]).plan();
+    expect(plan.sharedPlans).toEqual([]);
+
+    const shared = new MultiQueryPlanner([rspql(10), rspql(10)]).plan();
+    expect(shared.sharedPlans).toHaveLength(1);
+    expect(shared.sharedPlans[0].usedBy).toEqual([0, 1]);
+    expect(shared.sharedPlans[0].query).toContain('PREFIX : <https://rsp.js/>');
+    expect(shared.sharedPlans[0].query).toContain('REGISTER RStream <shared-0> AS');
+    expect(shared.sharedPlans[0].query).toContain('FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 10 STEP 2]');
+    expect(shared.sharedPlans[0].query).toContain('WHERE { WINDOW :w1 { ?s :hasTemp ?temp } }');
+  });
+
+  it('should emit shared queries that QueryDiff and PaneEvaluator accept', () => {
+    const rspql = (extra: string) => `PREFIX : <https://rsp.js/>
+      REGISTER RStream <output> AS
+      SELECT *
+      FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 10 STEP 2]
+      WHERE{
+          WINDOW :w1 { ?s :hasTemp ?temp . ?s :hasHum ?h . ${extra} }
+      }`;
+    const superQueries = [rspql('?s :location ?l'), rspql('?s :battery ?b')];
+    const shared = new MultiQueryPlanner(superQueries).plan().sharedPlans;
+
+    expect(shared).toHaveLength(1);
+    const evaluator = new PaneEvaluator(shared[0].query);
+    evaluator.add({ subject: '<https://rsp.js/s1>', predicate: '<https://rsp.js/hasTemp>', object: '21', timestamp: 1 });
+    evaluator.add({ subject: '<https://rsp.js/s1>', predicate: '<https://rsp.js/hasHum>', object: '40', timestamp: 1 });
+    expect(evaluator.advanceTo(2)[0].bindings).toHaveLength(1);
+
+    const analysis = new QueryDiff([shared[0].query], superQueries[0]).analyzeDifference();
+    expect(analysis.commonPatterns).toEqual(['?s :hasTemp ?temp', '?s :hasHum ?h']);
+    expect(analysis.uniqueToSuper).toEqual(['?s :location ?l']);
+  });
+
+  it('should emit residual RSP-QL queries over the super query window', () => {
+    const query = `PREFIX : <https://rsp.js/>
+      REGISTER RStream <output> AS
+      SELECT ?s ?temp
+      FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 10 STEP 2]
+      WHERE{
+          WINDOW :w1 { ?s :hasTemp ?temp . ?s :hasHumidity ?humidity }
+      }`;
+    const nectarQuery = new MultiQueryPlanner([query]).plan().queryPlans[0].nectarQuery;
+
+    expect(nectarQuery).toContain('REGISTER RStream <output> AS');
+    expect(nectarQuery).toContain('[RANGE 10 STEP 2]');
+    expect(nectarQuery).toContain('WINDOW :w1 { ?s :hasTemp ?temp . ?s :hasHumidity ?humidity }');
+  });
+
+  describe('FILTERs', () => {
+    const filtered = [
+      `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :hasHum ?h FILTER(?t > 20 && ?h < 50) }`,
+      `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :owner ?o FILTER(?t > 25) }`
+    ];
+
+    it('should only let subqueries with implied FILTERs cover patterns', () => {
+      const stricter = [`${prefix} SELECT * WHERE { ?s :hasHum ?h FILTER(?h < 30) }`];
+      const looser = [`${prefix} SELECT * WHERE { ?s :hasHum ?h FILTER(?h < 80) }`];
+
+      expect(new MultiQueryPlanner(filtered, stricter).plan().queryPlans[0].coveredPatterns).toEqual([]);
+      expect(new MultiQueryPlanner(filtered, looser).plan().queryPlans[0].coveredPatterns).toEqual(['?s :hasHum ?h']);
+    });
+
+    it('should push FILTERs into shared and residual queries and keep the rest for the join', () => {
+      const plan = new MultiQueryPlanner(filtered).plan();
+
+      expect(plan.sharedPlans).toHaveLength(1);
+      expect(plan.sharedPlans[0].query).toContain('FILTER(?t > 20)');
+      expect(plan.sharedPlans[0].query).not.toContain('?t > 25');
+      expect(plan.queryPlans[0].nectarQuery).toContain('WHERE { ?s :hasHum ?h FILTER(?h < 50) }');
+      expect(plan.queryPlans[0].joinFilters).toEqual([]);
+      expect(plan.queryPlans[1].nectarQuery).not.toContain('FILTER');
+      expect(plan.queryPlans[1].joinFilters).toEqual(['?t > 25']);
+    });
+
+    it('should keep variable-free FILTERs', () => {
+      const constant = [
+        `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :hasHum ?h FILTER(false) }`,
+        `${prefix} SELECT * WHERE { ?s :hasTemp ?t FILTER(false) }`,
+        `${prefix} SELECT * WHERE { ?s :hasTemp ?t . ?s :owner ?o }`
+      ];
+      const plan = new MultiQueryPlanner(constant).plan();
+
+      expect(plan.sharedPlans[0].query).not.toContain('FILTER');
+      expect(plan.queryPlans[0].nectarQuery).toContain('WHERE { ?s :hasHum ?h FILTER(false) }');
+      expect(plan.queryPlans[0].joinFilters).toEqual([]);
+      expect(plan.queryPlans[1].nectarQuery).toBe('');
+      expect(plan.queryPlans[1].joinFilters).toEqual(['false']);
+    });
+  });
+});
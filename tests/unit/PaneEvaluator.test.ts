@@ -0,0 +1,149 @@
+import { PaneEvaluator } from '../../src/lib/PaneEvaluator';
+import { QueryDiff } from '../../src/lib/QueryDiff';
+import { SolutionBinding, StreamQuad } from '../../src/types';
+
+const canonical = (bindings: SolutionBinding[]): string[] =>
+  bindings.map(binding => JSON.stringify(Object.entries(binding).sort())).sort();
+
+function sensorStream(length: number): StreamQuad[] {
+  const quads: StreamQuad[] = [];
+  for (let t = 0; t < length; t++) {
+    const sensor = `<https://rsp.js/sensor${t % 4}>`;
+    quads.push({ subject: sensor, predicate: '<https://rsp.js/hasTemp>', object: `${(t * 7) % 40}`, timestamp: t });
+    quads.push({ subject: sensor, predicate: '<https://rsp.js/hasHumidity>', object: `${(t * 13) % 90}`, timestamp: t });
+  }
+  return quads;
+}
+
+describe('PaneEvaluator', () => {
+  const superQuery = `PREFIX : <https://rsp.js/>
+    REGISTER RStream <output> AS
+    SELECT ?s ?temp ?humidity
+    FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+    WHERE{
+        WINDOW :w1 {
+          ?s :hasTemp ?temp .
+          ?s :hasHumidity ?humidity
+          FILTER(?temp > 20)
+        }
+    }`;
+
+  it('should use STEP-sized panes for the RSP-QL window', () => {
+    const evaluator = new PaneEvaluator(superQuery);
+
+    expect(evaluator.getOptions()).toEqual({ windowRange: 15, windowStep: 3 });
+    expect(evaluator.getPaneSize()).toBe(3);
+    expect(new PaneEvaluator(superQuery, { windowRange: 10, windowStep: 4 }).getPaneSize()).toBe(2);
+  });
+
+  it('should match full re-evaluation on every window', () => {
+    const quads = sensorStream(60);
+    const evaluator = new PaneEvaluator(superQuery);
+    const results = [];
+
+    for (const quad of quads) {
+      results.push(...evaluator.advanceTo(quad.timestamp));
+      evaluator.add(quad);
+    }
+    results.push(...evaluator.advanceTo(60));
+
+    expect(results.map(result => result.windowEnd)).toEqual(Array.from({ length: 20 }, (_, i) => (i + 1) * 3));
+    expect(results.some(result => result.bindings.length > 0)).toBe(true);
+    for (const result of results) {
+      expect(result.windowStart).toBe(result.windowEnd - 15);
+      expect(canonical(result.bindings)).toEqual(canonical(evaluator.evaluateWindow(quads, result.windowEnd)));
+    }
+  });
+
+  it('should match full re-evaluation when RANGE is not a multiple of STEP', () => {
+    const quads = sensorStream(40);
+    const evaluator = new PaneEvaluator(superQuery, { windowRange: 10, windowStep: 4 });
+
+    quads.forEach(quad => evaluator.add(quad));
+    const results = evaluator.advanceTo(40);
+
+    expect(results).toHaveLength(10);
+    for (const result of results) {
+      expect(canonical(result.bindings)).toEqual(canonical(evaluator.evaluateWindow(quads, result.windowEnd)));
+    }
+  });
+
+  it('should only join the new pane against the window', () => {
+    const quads = sensorStream(120);
+    const options = { windowRange: 30, windowStep: 3 };
+    const incremental = new PaneEvaluator(superQuery, options);
+    const full = new PaneEvaluator(superQuery, options);
+
+    quads.forEach(quad => incremental.add(quad));
+    incremental.advanceTo(30);
+    const warmUp = incremental.getJoinRowCount();
+    const results = incremental.advanceTo(120);
+    results.forEach(result => full.evaluateWindow(quads, result.windowEnd));
+
+    // Each step adds one tenth of the window, so the delta joins should do a
+    // small fraction of the work of re-evaluating every window.
+    expect(results).toHaveLength(30);
+    expect((incremental.getJoinRowCount() - warmUp) * 4).toBeLessThan(full.getJoinRowCount());
+  });
+
+  it('should only index the new pane when RANGE is much larger than STEP', () => {
+    const indexedPerStep = (windowRange: number): number => {
+      const quads = sensorStream(windowRange + 60);
+      const evaluator = new PaneEvaluator(superQuery, { windowRange, windowStep: 3 });
+
+      quads.forEach(quad => evaluator.add(quad));
+      evaluator.advanceTo(windowRange);
+      const warmUp = evaluator.getIndexedRowCount();
+      const results = evaluator.advanceTo(windowRange + 60);
+
+      expect(results).toHaveLength(20);
+      expect(canonical(results[19].bindings)).toEqual(canonical(evaluator.evaluateWindow(quads, windowRange + 60)));
+      return (evaluator.getIndexedRowCount() - warmUp) / results.length;
+    };
+
+    // Ten times the window, same index maintenance per step.
+    expect(indexedPerStep(300)).toBe(indexedPerStep(30));
+  });
+
+    it('should drop quads for panes that have already been evaluated', () => {
+    const evaluator = new PaneEvaluator(superQuery);
+
+    evaluator.add({ subject: '<https://rsp.js/s>', predicate: '<https://rsp.js/hasTemp>', object: '30', timestamp: 1 });
+    evaluator.advanceTo(6);
+    evaluator.add({ subject: '<https://rsp.js/s>', predicate: '<https://rsp.js/hasHumidity>', object: '50', timestamp: 2 });
+
+    expect(evaluator.getLateQuadCount()).toBe(1);
+    expect(evaluator.advanceTo(9)[0].bindings).toEqual([]);
+  });
+
+  it('should reject FILTERs it cannot evaluate per pane', () => {
+    const query = 'PREFIX : <https://rsp.js/> SELECT ?s WHERE { ?s :label ?l FILTER(regex(?l, "room")) }';
+
+    expect(() => new PaneEvaluator(query, { windowRange: 10, windowStep: 2 })).toThrow('Unsupported FILTER');
+  });
+
+  it('should evaluate the nectar query of a QueryDiff', () => {
+    const subqueries = [
+      `PREFIX : <https://rsp.js/>
+       REGISTER RStream <output> AS
+       SELECT ?s ?temp
+       FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+       WHERE{
+           WINDOW :w1 { ?s :hasTemp ?temp }
+       }`
+    ];
+    const evaluator = new QueryDiff(subqueries, superQuery).createPaneEvaluator();
+    const quads = sensorStream(30);
+
+    quads.forEach(quad => evaluator.add(quad));
+    const results = evaluator.advanceTo(30);
+
+    expect(evaluator.getOptions()).toEqual({ windowRange: 15, windowStep: 3 });
+    for (const result of results) {
+      expect(canonical(result.bindings)).toEqual(canonical(evaluator.evaluateWindow(quads, result.windowEnd)));
+      result.bindings.forEach(binding => expect(Object.keys(binding).sort()).toEqual(['humidity', 's']));
+    }
+
+    expect(() => new QueryDiff([], 'SELECT ?s WHERE { ?s ?p ?o }').createPaneEvaluator()).toThrow('only available for RSP-QL');
+  });
+});
@@ -0,0 +1,143 @@
+import { QueryDiff } from '../../src/lib/QueryDiff';
+import { extractBasicGraphPatterns } from '../../src/utils/queryUtils';
+import {
+  addFilters,
+  extractFilters,
+  isFilterImplied,
+  parseFilterConstraints
+} from '../../src/utils/filterUtils';
+
+describe('QueryDiff with FILTER support', () => {
+  describe('FILTER parsing', () => {
+    it('should extract filter expressions and split them into conjuncts', () => {
+      const query = 'SELECT ?s WHERE { ?s :hasTemp ?temp FILTER (?temp > 20.5 && (?temp <= 80)) FILTER regex(?s, "a&&b") }';
+
+      expect(extractFilters(query)).toEqual(['?temp > 20.5 && (?temp <= 80)', 'regex(?s, "a&&b")']);
+
+      const constraints = parseFilterConstraints('?temp > 20.5 && (?temp <= 80) && 10 < ?h');
+      expect(constraints.map(c => c.comparison)).toEqual([
+        { variable: 'temp', operator: '>', value: 20.5 },
+        { variable: 'temp', operator: '<=', value: 80 },
+        { variable: 'h', operator: '>', value: 10 }
+      ]);
+      expect(parseFilterConstraints('regex(?s, "a&&b")')[0].comparison).toBeUndefined();
+    });
+
+    it('should parse comparisons against IRIs and quoted literals', () => {
+      const constraints = parseFilterConstraints('?s = <https://rsp.js/s1> && ?l != "a<b" && ?t<5');
+
+      expect(constraints.map(c => c.comparison)).toEqual([
+        { variable: 's', operator: '=', value: '<https://rsp.js/s1>' },
+        { variable: 'l', operator: '!=', value: '"a<b"' },
+        { variable: 't', operator: '<', value: 5 }
+      ]);
+      expect(isFilterImplied(parseFilterConstraints('?s != <https://rsp.js/s2>')[0], constraints)).toBe(true);
+      expect(parseFilterConstraints('?t > ?h')[0].comparison).toBeUndefined();
+    });
+
+    it('should not split triple patterns inside FILTER expressions', () => {
+      const query = 'SELECT ?s WHERE { ?s :hasTemp ?temp . FILTER(?temp > 20.5) ?s :hasHum ?h }';
+
+      expect(extractBasicGraphPatterns(query)).toEqual(['?s :hasTemp ?temp', '?s :hasHum ?h']);
+    });
+  });
+
+  describe('filter implication', () => {
+    const [above20] = parseFilterConstraints('?temp > 20');
+
+    it('should imply looser numeric ranges', () => {
+      expect(isFilterImplied(parseFilterConstraints('?temp > 10')[0], [above20])).toBe(true);
+      expect(isFilterImplied(parseFilterConstraints('?temp >= 20')[0], [above20])).toBe(true);
+      expect(isFilterImplied(parseFilterConstraints('?temp != 5')[0], [above20])).toBe(true);
+    });
+
+    it('should not imply stricter ranges or unrelated filters', () => {
+      expect(isFilterImplied(parseFilterConstraints('?temp > 30')[0], [above20])).toBe(false);
+      expect(isFilterImplied(parseFilterConstraints('?temp < 40')[0], [above20])).toBe(false);
+      expect(isFilterImplied(parseFilterConstraints('?h > 10')[0], [above20])).toBe(false);
+      expect(isFilterImplied(parseFilterConstraints('?temp > 20')[0], parseFilterConstraints('?temp >= 20'))).toBe(false);
+    });
+
+    it('should imply identical non-comparison filters', () => {
+      const [regex] = parseFilterConstraints('regex(?s, "room")');
+
+      expect(isFilterImplied(regex, [regex])).toBe(true);
+      expect(isFilterImplied(regex, [above20])).toBe(false);
+    });
+  });
+
+  describe('filter-aware containment', () => {
+    it('should not treat a stricter filtered subquery as covering', () => {
+      const superQuery = 'SELECT ?s ?temp ?h WHERE { ?s :hasTemp ?temp . ?s :hasHum ?h FILTER(?temp > 20) }';
+      const subqueries = ['SELECT ?s ?temp WHERE { ?s :hasTemp ?temp FILTER(?temp > 30) }'];
+
+      const analysis = new QueryDiff(subqueries, superQuery, { queryLanguage: 'SPARQL' }).analyzeDifference();
+
+      expect(analysis.commonPatterns).toEqual([]);
+      expect(analysis.uniqueToSuper).toEqual(['?s :hasTemp ?temp', '?s :hasHum ?h']);
+      expect(analysis.superFilters).toEqual(['?temp > 20']);
+      expect(analysis.nonCoveringSubqueries).toHaveLength(1);
+    });
+
+    it('should treat a looser filtered subquery as covering', () => {
+      const superQuery = 'SELECT ?s ?temp ?h WHERE { ?s :hasTemp ?temp . ?s :hasHum ?h FILTER(?temp > 40) }';
+      const subqueries = ['SELECT ?s ?temp WHERE { ?s :hasTemp ?temp FILTER(?temp > 30) }'];
+
+      const analysis = new QueryDiff(subqueries, superQuery, { queryLanguage: 'SPARQL' }).analyzeDifference();
+
+      expect(analysis.commonPatterns).toEqual(['?s :hasTemp ?temp']);
+      expect(analysis.nonCoveringSubqueries).toEqual([]);
+    });
+  });
+
+  describe('filter pushdown', () => {
+    const superQuery = `PREFIX : <https://rsp.js/>
+      REGISTER RStream <output> AS
+      SELECT ?s ?temp ?humidity
+      FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+      WHERE{
+          WINDOW :w1 {
+            ?s :hasTemp ?temp .
+            ?s :hasHumidity ?humidity
+            FILTER(?temp > 40 && ?humidity < 50)
+          }
+      }`;
+
+    const subqueries = [
+      `PREFIX : <https://rsp.js/>
+       REGISTER RStream <output> AS
+       SELECT ?s ?temp
+       FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+       WHERE{
+           WINDOW :w1 { ?s :hasTemp ?temp }
+       }`
+    ];
+
+    it('should push super query filters into the nectar query', () => {
+      const nectarQuery = new QueryDiff(subqueries, superQuery).generateNectarQuery();
+
+      expect(nectarQuery).toContain('FILTER(?temp > 40)');
+      expect(nectarQuery).toContain('FILTER(?humidity < 50)');
+    });
+
+    it('should push filters bound by a subquery into that subquery', () => {
+      const [pushed] = new QueryDiff(subqueries, superQuery).getPushedDownSubqueries();
+
+      expect(pushed).toContain('WINDOW :w1 { ?s :hasTemp ?temp FILTER(?temp > 40) }');
+      expect(pushed).not.toContain('?humidity < 50');
+    });
+
+    it('should keep variable-free filters', () => {
+      const constant = superQuery.replace('?humidity < 50', 'NOW() < "2030-01-01T00:00:00Z"^^xsd:dateTime && false');
+      const diff = new QueryDiff(subqueries, constant);
+
+      expect(diff.generateNectarQuery()).toContain('FILTER(NOW() < "2030-01-01T00:00:00Z"^^xsd:dateTime)');
+      expect(diff.generateNectarQuery()).toContain('FILTER(false)');
+      expect(diff.getPushedDownSubqueries()[0]).toContain('FILTER(false)');
+    });
+
+    it('should leave queries without a WHERE clause unchanged', () => {
+      expect(addFilters('ASK {}', ['?x > 1'])).toBe('ASK {}');
+    });
+  });
+});
@@ -0,0 +1,67 @@
+import { ResourceSampler } from '../../src/lib/ResourceSampler';
+
+describe('ResourceSampler', () => {
+  it('should record a memory and CPU time series while running', async () => {
+    const sampler = new ResourceSampler({ intervalMs: 1 });
+
+    const { result, trace } = await sampler.measure('super', async () => {
+      const buffers: ArrayBuffer[] = [];
+      for (let i = 0; i < 20; i++) {
+        buffers.push(new ArrayBuffer(1024 * 1024));
+        await new Promise(resolve => setTimeout(resolve, 2));
+      }
+      return buffers.length;
+    });
+
+    expect(result).toBe(20);
+    expect(trace.label).toBe('super');
+    expect(trace.samples.length).toBeGreaterThan(2);
+    expect(trace.durationMs).toBeGreaterThan(0);
+    expect(sampler.isRunning()).toBe(false);
+
+    const first = trace.samples[0];
+    const last = trace.samples[trace.samples.length - 1];
+    expect(first.timeMs).toBeLessThanOrEqual(last.timeMs);
+    expect(last.rss).toBeGreaterThan(0);
+    expect(last.heapUsed).toBeGreaterThan(0);
+    expect(last.cpuUserMs).toBeGreaterThanOrEqual(first.cpuUserMs);
+    expect(Math.max(...trace.samples.map(s => s.arrayBuffers))).toBeGreaterThan(first.arrayBuffers);
+  });
+
+  it('should stop sampling when the measured function throws', async () => {
+    const sampler = new ResourceSampler({ recordGC: false });
+
+    await expect(sampler.measure('failing', () => {
+      throw new Error('query failed');
+    })).rejects.toThrow('query failed');
+    expect(sampler.isRunning()).toBe(false);
+  });
+
+  it('should reject starting twice or stopping when idle', () => {
+    const sampler = new ResourceSampler({ recordGC: false });
+
+    expect(() => sampler.stop()).toThrow('not running');
+    sampler.start();
+    expect(() => sampler.start()).toThrow('already running');
+    sampler.stop();
+  });
+
+  it('should serialize traces to CSV', () => {
+    const trace = {
+      label: 'parallel',
+      durationMs: 2,
+      samples: [
+        { timeMs: 0, rss: 100, heapUsed: 50, heapTotal: 80, external: 5, arrayBuffers: 1, cpuUserMs: 0, cpuSystemMs: 0 },
+        { timeMs: 2, rss: 120, heapUsed: 60, heapTotal: 80, external: 5, arrayBuffers: 1, cpuUserMs: 1.5, cpuSystemMs: 0.2 }
+      ],
+      gcEvents: [{ startMs: 1, durationMs: 0.4, kind: 1 }]
+    };
+
+    const samples = ResourceSampler.samplesToCSV([trace]).trim().split('\n');
+    expect(samples[0]).toBe('strategy,run,time_ms,rss,heap_used,heap_total,external,array_buffers,cpu_user_ms,cpu_system_ms');
+    expect(samples[2]).toBe('parallel,0,2,120,60,80,5,1,1.5,0.2');
+
+    const gc = ResourceSampler.gcEventsToCSV([trace]).trim().split('\n');
+    expect(gc).toEqual(['strategy,run,start_ms,duration_ms,kind', 'parallel,0,1,0.4,1']);
+  });
+});
@@ -0,0 +1,147 @@
+import { TermDictionary } from '../../src/lib/TermDictionary';
+import { QueryDiff } from '../../src/lib/QueryDiff';
+import { compactPattern, compactTerm, expandTerm, tokenizeTerms } from '../../src/utils/termUtils';
+import { splitTriplePatterns } from '../../src/utils/queryUtils';
+
+describe('TermDictionary', () => {
+  describe('term expansion', () => {
+    const prefixes = { '': 'https://rsp.js/', ex: 'https://rsp.js/', xsd: 'http://www.w3.org/2001/XMLSchema#' };
+
+    it('should expand prefixed names to full IRIs', () => {
+      expect(expandTerm(':hasTemp', prefixes)).toBe('<https://rsp.js/hasTemp>');
+      expect(expandTerm('ex:hasTemp', prefixes)).toBe('<https://rsp.js/hasTemp>');
+      expect(expandTerm('foaf:name', prefixes)).toBe('foaf:name');
+      expect(expandTerm('a', prefixes)).toBe('<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>');
+    });
+
+    it('should canonicalize variables and literals', () => {
+      expect(expandTerm('$s', prefixes)).toBe('?s');
+      expect(expandTerm('42', prefixes)).toBe('"42"^^<http://www.w3.org/2001/XMLSchema#integer>');
+      expect(expandTerm('"42"^^xsd:integer', prefixes)).toBe('"42"^^<http://www.w3.org/2001/XMLSchema#integer>');
+      expect(expandTerm('\'room\'@EN', prefixes)).toBe('"room"@en');
+    });
+
+    it('should compact expanded terms back into a prefix vocabulary', () => {
+      expect(compactTerm('<https://rsp.js/hasTemp>', { ex: 'https://rsp.js/' })).toBe('ex:hasTemp');
+      expect(compactTerm('<https://rsp.js/hasTemp>', {})).toBe('<https://rsp.js/hasTemp>');
+      expect(compactTerm(expandTerm('42', prefixes), {})).toBe('42');
+      expect(compactPattern(['?s', expandTerm('a', {}), '<https://rsp.js/Sensor>'], { '': 'https://rsp.js/' }))
+        .toBe('?s a :Sensor');
+    });
+
+    it('should keep quoted literals with spaces as one term', () => {
+      expect(tokenizeTerms('?s rdfs:label "living room"@en')).toEqual(['?s', 'rdfs:label', '"living room"@en']);
+    });
+  });
+
+  describe('pattern splitting', () => {
+    it('should not split inside IRIs, typed literals or decimals', () => {
+      expect(splitTriplePatterns('?s <https://rsp.js/hasTemp> ?t . ?s :limit "25"^^<http://www.w3.org/2001/XMLSchema#integer>. ?s :ratio 0.5'))
+        .toEqual([
+          '?s <https://rsp.js/hasTemp> ?t',
+          '?s :limit "25"^^<http://www.w3.org/2001/XMLSchema#integer>',
+          '?s :ratio 0.5'
+        ]);
+    });
+
+    it('should expand predicate-object lists into full triples', () => {
+      expect(splitTriplePatterns('?s :p ?a ; :q ?b , ?c . ?o a :Sensor ;')).toEqual([
+        '?s :p ?a', '?s :q ?b', '?s :q ?c', '?o a :Sensor'
+      ]);
+    });
+  });
+
+  describe('interning', () => {
+    it('should assign stable ids and decode them back', () => {
+      const terms = new TermDictionary();
+      const id = terms.intern('<https://rsp.js/hasTemp>');
+
+      expect(terms.intern('<https://rsp.js/hasTemp>')).toBe(id);
+      expect(terms.lookup(id)).toBe('<https://rsp.js/hasTemp>');
+      expect(terms.getId('?s')).toBeUndefined();
+      expect(terms.size()).toBe(1);
+    });
+
+    it('should encode equivalent patterns to the same key', () => {
+      const terms = new TermDictionary();
+      const first = terms.encodePattern('?s :hasTemp ?temp', { '': 'https://rsp.js/' })!;
+      const second = terms.encodePattern('?s  ex:hasTemp  ?temp', { ex: 'https://rsp.js/' })!;
+
+      expect(first).toEqual(second);
+      expect(TermDictionary.patternKey(first)).toBe(TermDictionary.patternKey(second));
+      expect(terms.decodePattern(first)).toBe('?s <https://rsp.js/hasTemp> ?temp');
+    });
+
+    it('should not encode patterns that are not a single triple', () => {
+      const terms = new TermDictionary();
+
+      expect(terms.encodePattern(':hasHumidity ?humidity', {})).toBeNull();
+    });
+  });
+
+  describe('QueryDiff integration', () => {
+    it('should match patterns written with different prefixes for the same IRI', () => {
+      const superQuery = `PREFIX : <https://rsp.js/>
+        REGISTER RStream <output> AS
+        SELECT ?s ?temp ?humidity
+        FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+        WHERE{
+            WINDOW :w1 {
+              ?s :hasTemp ?temp .
+              ?s :hasHumidity ?humidity
+            }
+        }`;
+
+      const subqueries = [
+        `PREFIX : <https://rsp.js/>
+         PREFIX ex: <https://rsp.js/>
+         REGISTER RStream <output> AS
+         SELECT ?s ?temp
+         FROM NAMED WINDOW :w1 ON STREAM :stream1 [RANGE 15 STEP 3]
+         WHERE{
+             WINDOW :w1 { ?s ex:hasTemp ?temp }
+         }`
+      ];
+
+      const analysis = new QueryDiff(subqueries, superQuery).analyzeDifference();
+
+      expect(analysis.commonPatterns).toEqual(['?s :hasTemp ?temp']);
+      expect(analysis.uniqueToSuper).toEqual(['?s :hasHumidity ?humidity']);
+      expect(analysis.uniqueToSub).toEqual([]);
+    });
+
+    it('should match a full IRI against a prefixed name and typed literals against numbers', () => {
+      const superQuery = `PREFIX : <https://rsp.js/>
+        SELECT ?s ?temp WHERE { ?s :hasTemp ?temp . ?s :threshold 25 . ?s :hasHumidity ?h }`;
+
+      const subqueries = [
+        'SELECT ?s ?temp WHERE { ?s <https://rsp.js/hasTemp> ?temp . ?s <https://rsp.js/threshold> "25"^^<http://www.w3.org/2001/XMLSchema#integer> }'
+      ];
+
+      const analysis = new QueryDiff(subqueries, superQuery).analyzeDifference();
+
+      expect(analysis.commonPatterns).toEqual(['?s :hasTemp ?temp', '?s :threshold 25']);
+      expect(analysis.uniqueToSuper).toEqual(['?s :hasHumidity ?h']);
+    });
+
+    it('should write MINUS patterns in the super query vocabulary', () => {
+      const superQuery = `PREFIX : <https://rsp.js/>
+        SELECT ?s ?temp ?humidity
+        WHERE { ?s :hasTemp ?temp . ?s :hasHumidity ?humidity }`;
+
+      const subqueries = [
+        'PREFIX ex: <https://rsp.js/> SELECT ?s ?temp WHERE { ?s ex:hasTemp ?temp }',
+        'PREFIX : <https://rsp.js/> SELECT ?s ?temp WHERE { ?s :hasTemp ?temp }',
+        'PREFIX ext: <https://example.org/> SELECT ?s ?room WHERE { ?s ext:room ?room }'
+      ];
+
+      const queryDiff = new QueryDiff(subqueries, superQuery);
+      const nectarQuery = queryDiff.generateAdvancedNectarQuery();
+
+      expect(queryDiff.getMinusPatterns()).toEqual(['?s :hasTemp ?temp', '?s <https://example.org/room> ?room']);
+      expect(nectarQuery).toContain('MINUS');
+      expect(nectarQuery).not.toContain('ex:');
+      expect(nectarQuery).not.toContain('ext:');
+    });
+  });
+});